@@ -0,0 +1,78 @@
+"""Throughput and ratio of each CSV export codec, per compression level.
+
+    python -m benchmarks.bench_compression [rows] [levels]
+
+``levels`` is e.g. ``gzip:1,6,9;zstd:1,3,9``. The CSV is built once with the
+export encoder (batches of 1000 rows); each codec then compresses the same
+chunks through CompressedEncoder, as the streaming export does.
+"""
+import json
+import sys
+import time
+
+from benchmarks.orders import make_docs
+from src.utils.compression import CompressedEncoder
+from src.utils.csv_export import CsvEncoder
+from src.utils.normalize import ORDER_COLUMNS, normalize_orders
+
+DEFAULT_LEVELS = {"gzip": [1, 6, 9], "zstd": [1, 3, 9, 19]}
+BATCH_SIZE = 1000
+
+
+class _Replay:
+    # encoder care reda chunk-urile CSV deja generate
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def start(self):
+        return self.chunks[0]
+
+    def encode(self, index):
+        return self.chunks[index]
+
+    def finish(self):
+        return b""
+
+
+def _parse_levels(text):
+    levels = {}
+    for part in text.split(";"):
+        codec, _, values = part.partition(":")
+        levels[codec.strip()] = [int(v) for v in values.split(",")]
+    return levels
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    levels = _parse_levels(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_LEVELS
+    docs = make_docs(n)
+    encoder = CsvEncoder(ORDER_COLUMNS)
+    chunks = [encoder.start()]
+    for i in range(0, n, BATCH_SIZE):
+        chunks.append(encoder.encode(normalize_orders(docs[i:i + BATCH_SIZE])))
+    size = sum(len(c) for c in chunks)
+
+    results = []
+    for codec, codec_levels in levels.items():
+        for level in codec_levels:
+            best = float("inf")
+            for _ in range(3):
+                compressed = CompressedEncoder(_Replay(chunks), codec, level)
+                t0 = time.perf_counter()
+                out = len(compressed.start())
+                for index in range(1, len(chunks)):
+                    out += len(compressed.encode(index))
+                out += len(compressed.finish())
+                best = min(best, time.perf_counter() - t0)
+            results.append({
+                "codec": codec,
+                "level": level,
+                "bytes": out,
+                "ratio": round(size / out, 2),
+                "mb_per_s": round(size / (1024 * 1024) / best, 1),
+            })
+    print(json.dumps({"rows": n, "csv_bytes": size, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
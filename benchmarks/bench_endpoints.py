@@ -0,0 +1,325 @@
+"""End-to-end cost of the export and invoice endpoints as the collection grows.
+
+    python -m benchmarks.bench_endpoints --rows 1000,10000,100000 [--malformed 0.05]
+        [--max-products 5] [--mongo-uri mongodb://localhost:27017] [--output run.json]
+        [--compare previous.json]
+
+The app is served by uvicorn on a local port and every endpoint is fetched
+over real HTTP, so the time to first byte is measured on the socket. Without
+``--mongo-uri`` the data lives in an in-process mongomock collection (see
+benchmarks/mock_mongo.py). Each size gets a freshly seeded collection.
+
+Output is one JSON document: ``meta`` (machine/backend/settings) and
+``results``, one entry per (scenario, rows). With ``--compare`` every entry
+also carries the latency ratio against the matching entry of an earlier run.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import httpx
+import uvicorn
+
+from benchmarks.orders import iter_docs
+
+EXPORTS = {
+    "export-xlsx": "/export-orders",
+    "export-csv": "/export-orders.csv",
+    "export-parquet": "/export-orders.parquet",
+    "export-arrow": "/export-orders.arrow",
+    "export-csv-lines": "/export-orders.csv?layout=lines",
+    "export-csv-gzip": "/export-orders.csv?compress=gzip",
+    "export-csv-zstd": "/export-orders.csv?compress=zstd",
+    "export-csv-parallel": "/export-orders.csv?parallel=true",
+    "export-xlsx-parallel": "/export-orders?parallel=true",
+    "export-xlsx-months": "/export-orders?sheetBy=month",
+}
+# workerii exportului paralel se conecteaza singuri la MongoDB, deci nu vad colectia mongomock
+MONGOD_ONLY = {"export-csv-parallel", "export-xlsx-parallel", "export-xlsx-months"}
+SEED_CHUNK = 10000
+
+
+def _rss_bytes():
+    # RSS curent (Linux); altfel varful raportat de getrusage
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RssSampler:
+    """Samples the process RSS in a thread; ``peak``/``baseline`` in bytes."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.baseline = self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def __enter__(self):
+        self.baseline = self.peak = _rss_bytes()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def _fetch(client, url):
+    with RssSampler() as rss:
+        t0 = time.perf_counter()
+        ttfb = None
+        size = 0
+        with client.stream("GET", url) as response:
+            response.raise_for_status()
+            for chunk in response.iter_raw():
+                if ttfb is None:
+                    ttfb = time.perf_counter() - t0
+                size += len(chunk)
+        latency = time.perf_counter() - t0
+    return {"latency": latency, "ttfb": ttfb or latency, "bytes": size, "rss": rss}
+
+
+def _mb(n):
+    return round(n / (1024 * 1024), 2)
+
+
+def bench_stream(client, scenario, url, rows, repeat):
+    runs = [_fetch(client, url) for _ in range(repeat)]
+    best = min(runs, key=lambda r: r["latency"])
+    return {
+        "scenario": scenario,
+        "rows": rows,
+        "latency_s": round(best["latency"], 4),
+        "latency_median_s": round(statistics.median(r["latency"] for r in runs), 4),
+        "ttfb_s": round(best["ttfb"], 4),
+        "bytes": best["bytes"],
+        "rows_per_s": round(rows / best["latency"], 1),
+        "mb_per_s": round(_mb(best["bytes"]) / best["latency"], 2),
+        "peak_rss_mb": _mb(max(r["rss"].peak for r in runs)),
+        "rss_growth_mb": _mb(max(r["rss"].peak - r["rss"].baseline for r in runs)),
+    }
+
+
+def _percentiles(timings):
+    timings = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(timings) * 1000, 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(0.95 * len(timings)))] * 1000, 2),
+    }
+
+
+def bench_invoices(client, keys, rows):
+    # prima cerere randeaza PDF-ul, a doua il ia din cache
+    results = []
+    for phase in ("invoice-cold", "invoice-warm"):
+        timings = []
+        with RssSampler() as rss:
+            for key in keys:
+                t0 = time.perf_counter()
+                client.get(f"/orders/{key}/invoice.pdf").raise_for_status()
+                timings.append(time.perf_counter() - t0)
+        results.append({
+            "scenario": phase,
+            "rows": rows,
+            "requests": len(keys),
+            **_percentiles(timings),
+            "requests_per_s": round(len(timings) / sum(timings), 1),
+            "peak_rss_mb": _mb(rss.peak),
+            "rss_growth_mb": _mb(rss.peak - rss.baseline),
+        })
+    return results
+
+
+class Backend:
+    """Seeds a collection per run size and hands the app its async collection."""
+
+    def __init__(self, mongo_uri=None, db_name="florarie_bench", collection_name="orders"):
+        self.mongo_uri = mongo_uri
+        self.db_name = db_name
+        self.collection_name = collection_name
+        self.name = "mongod" if mongo_uri else "mongomock"
+        self._sync = None
+
+    def install(self):
+        # clientul comun al aplicatiei e deschis de lifespan, in loop-ul serverului
+        from src import db
+        db.mongo = db.MongoConnection(self.mongo_uri, self.db_name, self.collection_name)
+
+    def seed(self, docs):
+        import src.main as app_module
+        if self.mongo_uri:
+            from pymongo import MongoClient
+            if self._sync is None:
+                self._sync = MongoClient(self.mongo_uri)
+            collection = self._sync[self.db_name][self.collection_name]
+            collection.drop()
+        else:
+            from benchmarks.mock_mongo import mock_collection
+            collection = mock_collection(self.collection_name)
+        chunk = []
+        for doc in docs:
+            chunk.append(doc)
+            if len(chunk) >= SEED_CHUNK:
+                collection.insert_many(chunk)
+                chunk = []
+        if chunk:
+            collection.insert_many(chunk)
+        if self.mongo_uri:
+            collection.create_index("orderDate")
+            collection.create_index("orderNumber")
+        else:
+            from benchmarks.mock_mongo import MockCollection
+            from src import db
+            # fara ping real: conexiunea trebuie marcata ready, altfel rutele raspund 503
+            db.mongo.use(MockCollection(collection))
+            app_module.orders_collection = db.mongo.orders
+        # cache-urile din proces nu trebuie sa treaca de la o dimensiune la alta
+        app_module.order_id_cache.clear()
+        # fiecare repetare trebuie sa randeze exportul, nu sa-l ia din cache
+        app_module.export_cache.max_bytes = 0
+        app_module.analytics_cache.clear()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app, port):
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise SystemExit("uvicorn failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+
+def run(args):
+    # cache-urile (.cache/...) si .env se rezolva relativ la directorul curent
+    workdir = tempfile.mkdtemp(prefix="florarie-bench-")
+    os.chdir(workdir)
+    import src.main as app_module
+
+    backend = Backend(args.mongo_uri, args.mongo_db)
+    backend.install()
+    port = _free_port()
+    server, thread = start_server(app_module.app, port)
+
+    results = []
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+            for rows in args.rows:
+                keys = []
+                step = max(1, rows // args.invoices)
+
+                def docs():
+                    for i, doc in enumerate(iter_docs(rows, args.malformed, args.seed, args.max_products)):
+                        if i % step == 0 and len(keys) < args.invoices:
+                            keys.append(doc["orderNumber"])
+                        yield doc
+
+                t0 = time.perf_counter()
+                backend.seed(docs())
+                print(f"seeded {rows} orders in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+                for scenario, url in EXPORTS.items():
+                    if args.scenarios and scenario not in args.scenarios:
+                        continue
+                    if scenario in MONGOD_ONLY and not args.mongo_uri:
+                        continue
+                    results.append(bench_stream(client, scenario, url, rows, args.repeat))
+                    print(json.dumps(results[-1]), file=sys.stderr)
+                if not args.scenarios or "invoice" in args.scenarios:
+                    results.extend(bench_invoices(client, keys, rows))
+                if not args.scenarios or "invoices-zip" in args.scenarios:
+                    url = "/invoices.zip?" + "&".join(f"ids={k}" for k in keys)
+                    results.append(bench_stream(client, "invoices-zip", url, len(keys), 1))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    return {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "backend": backend.name,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "malformed_share": args.malformed,
+            "max_products": args.max_products,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def compare(report, previous):
+    baseline = {(r["scenario"], r["rows"]): r for r in previous["results"]}
+    for result in report["results"]:
+        old = baseline.get((result["scenario"], result["rows"]))
+        key = "latency_s" if "latency_s" in result else "p50_ms"
+        if old and old.get(key):
+            result["baseline_" + key] = old[key]
+            result["ratio"] = round(result[key] / old[key], 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="1000,10000",
+                        type=lambda s: [int(float(x)) for x in s.split(",")],
+                        help="comma-separated collection sizes, e.g. 1000,100000,1e6")
+    parser.add_argument("--malformed", type=float, default=0.05, help="share of documents failing validation")
+    parser.add_argument("--max-products", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per export; the fastest is reported")
+    parser.add_argument("--invoices", type=int, default=50, help="orders sampled for the invoice scenarios")
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=None,
+                        help=f"subset of: {', '.join(EXPORTS)}, invoice, invoices-zip")
+    parser.add_argument("--mongo-uri", default=None, help="local mongod to use instead of mongomock")
+    parser.add_argument("--mongo-db", default="florarie_bench")
+    parser.add_argument("--output", default=None, help="also write the report to this file")
+    parser.add_argument("--compare", default=None, help="earlier report to compute latency ratios against")
+    args = parser.parse_args()
+
+    compare_with = None
+    if args.compare:
+        with open(os.path.abspath(args.compare), encoding="utf-8") as f:
+            compare_with = json.load(f)
+    output = os.path.abspath(args.output) if args.output else None
+
+    # mesajele aplicatiei (lifespan) merg pe stderr; stdout ramane doar JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(args)
+    if compare_with is not None:
+        compare(report, compare_with)
+    encoded = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(encoded)
+    print(encoded)
+
+
+if __name__ == "__main__":
+    main()
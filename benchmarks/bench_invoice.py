@@ -0,0 +1,45 @@
+"""Invoice render latency: warm-up cost, first render and steady-state percentiles.
+
+    python -m benchmarks.bench_invoice [invoices]
+"""
+import json
+import statistics
+import sys
+import time
+
+from benchmarks.orders import make_docs
+from src.utils.normalize import prepare_order_doc
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    docs = [prepare_order_doc(doc) for doc in make_docs(n + 1, malformed_share=0)]
+
+    t0 = time.perf_counter()
+    from src.utils.invoice_pdf import invoice_renderer
+    setup = time.perf_counter() - t0
+    warm_up = invoice_renderer.warm_up()
+
+    t0 = time.perf_counter()
+    invoice_renderer.render(docs[0])
+    first = time.perf_counter() - t0
+
+    timings = []
+    for doc in docs[1:]:
+        t0 = time.perf_counter()
+        invoice_renderer.render(doc)
+        timings.append(time.perf_counter() - t0)
+    timings.sort()
+
+    print(json.dumps({
+        "invoices": n,
+        "setup_ms": round(setup * 1000, 2),
+        "warm_up_ms": round(warm_up * 1000, 2),
+        "first_render_ms": round(first * 1000, 2),
+        "median_ms": round(statistics.median(timings) * 1000, 2),
+        "p95_ms": round(timings[int(0.95 * len(timings))] * 1000, 2),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Per-row cost of order normalization: legacy export loop vs src.utils.normalize.
+
+    python -m benchmarks.bench_normalize [rows] [malformed_share]
+"""
+import copy
+import json
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.orders import make_docs
+from src.schemas.order import OrderProps
+from src.utils.normalize import normalize_orders
+
+
+def legacy_rows(raw_orders):
+    # bucla de normalizare din export_orders / _build_orders_df inainte de refactorizare
+    rows = []
+    for doc in raw_orders:
+        if "_id" in doc and "id" not in doc:
+            try:
+                doc["id"] = str(doc["_id"])
+            except Exception:
+                doc["id"] = doc["_id"]
+        if "orderDate" in doc and isinstance(doc["orderDate"], datetime):
+            doc["orderDate"] = doc["orderDate"].isoformat()
+        if "deliveryDate" in doc and isinstance(doc["deliveryDate"], datetime):
+            doc["deliveryDate"] = doc["deliveryDate"].isoformat()
+
+        products = doc.get("products", [])
+        try:
+            products_json = json.dumps(products, ensure_ascii=False)
+        except Exception:
+            products_json = str(products)
+
+        try:
+            order = OrderProps.parse_obj(doc)
+            row = {
+                "id": order.id,
+                "userId": order.userId,
+                "orderNumber": order.orderNumber,
+                "clientName": order.clientName,
+                "clientEmail": order.clientEmail,
+                "clientPhone": order.clientPhone,
+                "clientAddress": order.clientAddress,
+                "orderDate": order.orderDate.isoformat() if isinstance(order.orderDate, datetime) else str(order.orderDate),
+                "deliveryDate": order.deliveryDate.isoformat() if isinstance(order.deliveryDate, datetime) else (str(order.deliveryDate) if order.deliveryDate else ""),
+                "info": order.info or "",
+                "status": order.status,
+                "totalPrice": order.totalPrice,
+                "paymentMethod": order.paymentMethod,
+                "products": json.dumps([p.dict() for p in order.products], ensure_ascii=False)
+            }
+        except Exception:
+            row = {
+                "id": doc.get("id", ""),
+                "userId": doc.get("userId", ""),
+                "orderNumber": doc.get("orderNumber", ""),
+                "clientName": doc.get("clientName", ""),
+                "clientEmail": doc.get("clientEmail", ""),
+                "clientPhone": doc.get("clientPhone", ""),
+                "clientAddress": doc.get("clientAddress", ""),
+                "orderDate": doc.get("orderDate", ""),
+                "deliveryDate": doc.get("deliveryDate", ""),
+                "info": doc.get("info", ""),
+                "status": doc.get("status", ""),
+                "totalPrice": doc.get("totalPrice", ""),
+                "paymentMethod": doc.get("paymentMethod", ""),
+                "products": products_json
+            }
+        rows.append(row)
+    return rows
+
+
+def _time_per_row(fn, docs, repeat=3, batch_size=1000):
+    best = float("inf")
+    for _ in range(repeat):
+        batch_copies = [copy.deepcopy(docs[i:i + batch_size]) for i in range(0, len(docs), batch_size)]
+        t0 = time.perf_counter()
+        for batch in batch_copies:
+            fn(batch)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(docs)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    malformed_share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    docs = make_docs(n, malformed_share)
+
+    if legacy_rows(copy.deepcopy(docs)) != normalize_orders(copy.deepcopy(docs)):
+        raise SystemExit("normalize_orders output differs from the legacy loop")
+
+    legacy = _time_per_row(legacy_rows, docs)
+    current = _time_per_row(normalize_orders, docs)
+    print(json.dumps({
+        "rows": n,
+        "malformed_share": malformed_share,
+        "legacy_us_per_row": round(legacy * 1e6, 2),
+        "normalize_us_per_row": round(current * 1e6, 2),
+        "speedup": round(legacy / current, 2),
+    }))
+
+
+if __name__ == "__main__":
+    main()
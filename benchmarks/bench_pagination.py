@@ -0,0 +1,81 @@
+"""Keyset pagination of GET /orders over dated and undated orders.
+
+    python -m benchmarks.bench_pagination [rows] [limit]
+
+Walks every page in both directions against a mongomock collection and
+fails unless each order is listed exactly once: orders whose ``orderDate``
+is a string, null or missing come after the dated ones. Also reports the
+time of the first and the last page (needs ``pip install mongomock``).
+"""
+import asyncio
+import json
+import sys
+import time
+
+import orjson
+
+from benchmarks.mock_mongo import MockCollection, mock_collection
+from benchmarks.orders import make_docs
+from src import db
+from src.routers.orders import list_orders
+
+
+def mixed_docs(n):
+    # aceeasi data pentru mai multe comenzi, plus orderDate string / null / lipsa
+    docs = make_docs(n, malformed_share=0)
+    for i in range(1, n, 5):
+        docs[i]["orderDate"] = docs[i - 1]["orderDate"]
+    for i, doc in enumerate(docs):
+        if i % 17 == 0:
+            doc["orderDate"] = doc["orderDate"].isoformat()
+        elif i % 23 == 0:
+            doc["orderDate"] = None
+        elif i % 29 == 0:
+            del doc["orderDate"]
+    return docs
+
+
+async def walk(order, limit):
+    """Ids of every listed order, in listing order, and the time of each page."""
+    ids, timings, cursor = [], [], None
+    while True:
+        t0 = time.perf_counter()
+        response = await list_orders(
+            orderDateFrom=None, orderDateTo=None, deliveryDateFrom=None, deliveryDateTo=None,
+            status=None, paymentMethod=None, columns="orderNumber",
+            limit=limit, cursor=cursor, order=order,
+        )
+        timings.append(time.perf_counter() - t0)
+        page = orjson.loads(response.body)
+        ids.extend(item["_id"] for item in page["items"])
+        cursor = page["nextCursor"]
+        if cursor is None:
+            return ids, timings
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    docs = mixed_docs(n)
+    collection = mock_collection()
+    collection.insert_many(docs)
+    db.mongo.use(MockCollection(collection))
+
+    expected = sorted(str(doc["_id"]) for doc in docs)
+    undated = sum(1 for doc in docs if not hasattr(doc.get("orderDate"), "year"))
+    results = []
+    for order in ("desc", "asc"):
+        ids, timings = asyncio.run(walk(order, limit))
+        if len(ids) != len(set(ids)) or sorted(ids) != expected:
+            raise SystemExit(f"order={order}: {len(set(ids))} distinct of {len(ids)} listed, expected {n} orders once")
+        results.append({
+            "order": order,
+            "pages": len(timings),
+            "first_page_ms": round(timings[0] * 1000, 2),
+            "last_page_ms": round(timings[-1] * 1000, 2),
+        })
+    print(json.dumps({"rows": n, "undated": undated, "limit": limit, "results": results}))
+
+
+if __name__ == "__main__":
+    main()
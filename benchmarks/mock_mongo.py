@@ -0,0 +1,67 @@
+"""In-process stand-in for the async pymongo collection, backed by mongomock.
+
+Only the calls the app makes are covered (find/to_list/close, find_one,
+aggregate, count_documents, create_index, ...). Needs ``pip install mongomock``;
+numbers measured against it include mongomock's own overhead, so compare
+runs on the same backend only.
+"""
+import asyncio
+
+
+class MockCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, n):
+        self._cursor = self._cursor.limit(n)
+        return self
+
+    async def to_list(self, length=None):
+        docs = []
+        for doc in self._cursor:
+            docs.append(doc)
+            if length and len(docs) >= length:
+                break
+        # lasa si alte task-uri sa ruleze, ca un cursor real
+        await asyncio.sleep(0)
+        return docs
+
+    async def close(self):
+        pass
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._cursor)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class MockCollection:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def find(self, *args, batch_size=None, **kwargs):
+        return MockCursor(self.collection.find(*args, **kwargs))
+
+    async def aggregate(self, pipeline, **kwargs):
+        return MockCursor(iter(list(self.collection.aggregate(pipeline, **kwargs))))
+
+    def __getattr__(self, name):
+        method = getattr(self.collection, name)
+
+        async def call(*args, **kwargs):
+            await asyncio.sleep(0)
+            return method(*args, **kwargs)
+        return call
+
+
+def mock_collection(name="orders"):
+    import mongomock
+    return mongomock.MongoClient().bench[name]
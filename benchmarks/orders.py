@@ -0,0 +1,60 @@
+"""Synthetic OrderProps-shaped documents shared by the benchmarks."""
+import random
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+STATUSES = ["Pending", "Processing", "Delivered", "Cancelled"]
+PAYMENT_METHODS = ["ramburs", "card"]
+
+
+def _malform(doc, rnd):
+    # cateva forme reale de date stricate care trimit documentul pe ramura de fallback
+    kind = rnd.randrange(4)
+    if kind == 0:
+        doc["status"] = "Unknown"
+    elif kind == 1:
+        doc["totalPrice"] = str(doc["totalPrice"])
+    elif kind == 2:
+        doc["orderDate"] = doc["orderDate"].isoformat()
+    else:
+        doc["products"][0]["quantity"] = str(doc["products"][0]["quantity"])
+
+
+def iter_docs(n, malformed_share=0.05, seed=42, max_products=5, start=datetime(2024, 1, 1)):
+    """Yield ``n`` order documents; ``malformed_share`` of them fail OrderProps validation."""
+    rnd = random.Random(seed)
+    for i in range(n):
+        doc = {
+            "_id": ObjectId(),
+            "userId": f"user-{rnd.randint(1, 500)}",
+            "orderNumber": 10000 + i,
+            "clientName": f"Client {i}",
+            "clientEmail": f"client{i}@example.ro",
+            "clientPhone": f"07{rnd.randint(10000000, 99999999)}",
+            "clientAddress": f"Str. Florilor {rnd.randint(1, 300)}, Piatra Neamț",
+            "orderDate": start + timedelta(minutes=37 * i),
+            "deliveryDate": start + timedelta(minutes=37 * i, days=1) if i % 3 else None,
+            "info": "Livrare dupa ora 17" if i % 4 == 0 else None,
+            "status": rnd.choice(STATUSES),
+            "totalPrice": round(rnd.uniform(50, 900), 2),
+            "paymentMethod": rnd.choice(PAYMENT_METHODS),
+            "updatedAt": start + timedelta(minutes=37 * i),
+            "products": [
+                {
+                    "id": f"prod-{rnd.randint(1, 200)}",
+                    "title": rnd.choice(["Buchet trandafiri", "Aranjament lalele", "Coș flori"]),
+                    "price": round(rnd.uniform(20, 300), 2),
+                    "title_category": rnd.choice(["Buchete", "Aranjamente", "Cosuri"]),
+                    "quantity": rnd.randint(1, 5),
+                }
+                for _ in range(rnd.randint(1, max_products))
+            ],
+        }
+        if rnd.random() < malformed_share:
+            _malform(doc, rnd)
+        yield doc
+
+
+def make_docs(n, malformed_share=0.05, seed=42, max_products=5):
+    return list(iter_docs(n, malformed_share, seed, max_products))
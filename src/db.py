@@ -1,14 +1,133 @@
-from pymongo import MongoClient
+import asyncio
+import time
+
+import certifi
 from dotenv import load_dotenv, dotenv_values
+from pymongo import AsyncMongoClient
+from pymongo.server_api import ServerApi
 
 load_dotenv()
 config = dotenv_values(".env")
 
 MONGO_URI = config.get("MONGO_URI")
 DB_NAME = config.get("DB_NAME")
+COLLECTION_NAME = config.get("COLLECTION_NAME")
+
+
+def _client_options():
+    return {
+        "server_api": ServerApi("1"),
+        "tls": True,
+        "tlsCAFile": certifi.where(),
+        # un singur pool pentru tot procesul (exporturi, facturi, CRUD)
+        "maxPoolSize": int(config.get("MONGO_MAX_POOL_SIZE") or 50),
+        "minPoolSize": int(config.get("MONGO_MIN_POOL_SIZE") or 0),
+        "maxIdleTimeMS": int(config.get("MONGO_MAX_IDLE_TIME_MS") or 300000),
+        "serverSelectionTimeoutMS": int(config.get("MONGO_SERVER_SELECTION_TIMEOUT_MS") or 5000),
+        "connectTimeoutMS": int(config.get("MONGO_CONNECT_TIMEOUT_MS") or 5000),
+    }
+
+
+class MongoConnection:
+    """The process-wide MongoDB client, shared by every route.
+
+    ``open()`` only builds the client (pymongo connects lazily), so startup
+    never waits for the network; a background task pings the deployment and
+    keeps ``ready`` up to date. ``on_ready`` runs once, after the first
+    successful ping.
+    """
+
+    def __init__(self, uri, db_name, collection_name, health_interval=30, **client_options):
+        self.uri = uri
+        self.db_name = db_name
+        self.collection_name = collection_name
+        self.health_interval = health_interval
+        self.client_options = client_options
+        self.client = None
+        self.orders = None
+        self.ready = False
+        self.last_error = None
+        self.last_ping_ms = None
+        self.checked_at = None
+        self._health_task = None
+
+    @property
+    def configured(self):
+        return bool(self.uri and self.db_name and self.collection_name)
+
+    def open(self, on_ready=None):
+        if not self.configured:
+            print("MONGO_URI / DB_NAME / COLLECTION_NAME not set in .env; skipping MongoDB connection.")
+            return
+        self.client = AsyncMongoClient(self.uri, **self.client_options)
+        self.orders = self.client[self.db_name][self.collection_name]
+        self._health_task = asyncio.ensure_future(self._health_loop(on_ready))
+
+    def use(self, collection):
+        """Serve ``collection`` instead of a client of our own (benchmarks, tests); it counts as ready."""
+        self.orders = collection
+        self.ready = True
+
+    async def ping(self):
+        t0 = time.perf_counter()
+        try:
+            await self.client.admin.command("ping")
+        except Exception as e:
+            if self.ready or self.last_error is None:
+                print("MongoDB ping failed:", e)
+            self.ready = False
+            self.last_error = str(e)
+        else:
+            self.ready = True
+            self.last_error = None
+            self.last_ping_ms = round((time.perf_counter() - t0) * 1000, 1)
+        self.checked_at = time.time()
+        return self.ready
+
+    async def _health_loop(self, on_ready):
+        connected = False
+        while True:
+            if await self.ping() and not connected:
+                connected = True
+                print("Pinged your deployment. You successfully connected to MongoDB Atlas!")
+                if on_ready is not None:
+                    await on_ready()
+            # cat timp serverul nu raspunde reincercam mai des
+            await asyncio.sleep(self.health_interval if self.ready else min(5, self.health_interval))
+
+    def status(self):
+        return {
+            "configured": self.configured,
+            "ready": self.ready,
+            "lastPingMs": self.last_ping_ms,
+            "lastError": self.last_error,
+            "checkedAt": self.checked_at,
+        }
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        if self.client is not None:
+            await self.client.close()
+        self.client = None
+        self.orders = None
+        self.ready = False
+
+
+mongo = MongoConnection(
+    MONGO_URI,
+    DB_NAME,
+    COLLECTION_NAME,
+    health_interval=int(config.get("MONGO_HEALTH_INTERVAL_SECONDS") or 30),
+    **_client_options(),
+)
 
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
 
 def get_orders_collection():
-    return db[config.get("COLLECTION_NAME")]
\ No newline at end of file
+    # colectia din clientul comun (None daca MongoDB nu e configurat sau nu raspunde la ping)
+    return mongo.orders if mongo.ready else None
@@ -1,20 +1,157 @@
-from fastapi import FastAPI
-from fastapi.responses import StreamingResponse, JSONResponse
-from pymongo import MongoClient
-from pymongo.server_api import ServerApi
-import pandas as pd
-from io import BytesIO
+from fastapi import FastAPI, Depends, Query, Request
+from fastapi.responses import StreamingResponse, JSONResponse, Response, FileResponse
 from dotenv import load_dotenv, dotenv_values
-import certifi
+import asyncio
 import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime
-from src.schemas.order import OrderProps
-from bson import ObjectId
+from typing import List, Optional
+from src.utils.excel import XlsxEncoder, XLSX_MEDIA_TYPE
+from src.utils.arrow_export import ArrowEncoder, ParquetEncoder, ARROW_MEDIA_TYPE, PARQUET_MEDIA_TYPE
+from src.utils.csv_export import CsvEncoder, CSV_MEDIA_TYPE
+from src.utils.compression import COMPRESSION_CODECS, DEFAULT_LEVELS, CompressedEncoder, negotiate_encoding
+from src.utils.normalize import normalize_orders, prepare_order_doc
+from src.utils.snapshot import OrderSnapshot
+from src.utils.line_items import line_item_projection, line_item_rows, parse_line_item_columns
+from src.utils.sharded_export import (
+    SPLIT_KEYS, CsvMerger, XlsxMerger, export_partition, merge_chunk, month_partitions, range_partitions,
+    sample_split_points,
+)
+from src.utils.export_jobs import ExportJobManager
+from src.utils.export_cache import ExportCache, etag_matches, export_etag, export_key
+from src.utils.metrics import (
+    METRICS_MEDIA_TYPE, EXPORT_CACHE, INVOICE_STAGE, ExportTrace, render_metrics, server_timing,
+)
+from src.utils.query import ORDER_INDEXES, build_order_filter, build_projection, parse_columns
+from src.utils.cache import LRUCache, TTLCache
+from src.utils.analytics import align_range, build_revenue_pipeline, format_buckets
+from src.utils.invoice_cache import invoice_cache, invoice_digest
+from src.utils.invoice_pdf import invoice_renderer, render_invoice
+from src.utils.invoice_batch import ZIP_MEDIA_TYPE, invoice_payload, stream_invoice_zip
+from src import db
+from src.routers import orders as orders_router
+from src.utils.lookup import MAX_CANDIDATES, order_key_clauses, pick_order, describe_clauses
 from starlette.middleware.cors import CORSMiddleware
+from pymongo.errors import ServerSelectionTimeoutError
 
 load_dotenv()
 config = dotenv_values(".env")
-app = FastAPI()
+
+# cate documente citim/scriem o data la export (limiteaza memoria folosita)
+EXPORT_BATCH_SIZE = int(config.get("EXPORT_BATCH_SIZE") or 1000)
+# nivelul de compresie pentru exporturile CSV comprimate (gzip 1-9, zstd 1-22)
+COMPRESSION_LEVELS = {
+    codec: int(config.get(f"EXPORT_{codec.upper()}_LEVEL") or level) for codec, level in DEFAULT_LEVELS.items()
+}
+# executor dedicat pentru munca CPU (PDF, XLSX, normalizare), separat de threadpool-ul Starlette
+RENDER_WORKERS = int(config.get("RENDER_WORKERS") or min(4, os.cpu_count() or 1))
+# procese pentru randarea in masa a facturilor (/invoices.zip)
+INVOICE_PROCESSES = int(config.get("INVOICE_PROCESSES") or os.cpu_count() or 1)
+# procese si partitii pentru exporturile paralele (?parallel=true / ?sheetBy=month)
+EXPORT_PROCESSES = int(config.get("EXPORT_PROCESSES") or os.cpu_count() or 1)
+EXPORT_PARTITIONS = int(config.get("EXPORT_PARTITIONS") or EXPORT_PROCESSES * 4)
+EXPORT_SHARD_DIR = config.get("EXPORT_SHARD_DIR") or os.path.join(".cache", "shards")
+
+# colectia din clientul comun (src.db.mongo); None daca MongoDB nu e configurat
+orders_collection = None
+render_executor = None
+invoice_process_pool = None
+export_process_pool = None
+# copie locala (Arrow IPC) a comenzilor normalizate, pentru export cu ?source=snapshot
+order_snapshot = OrderSnapshot(
+    config.get("SNAPSHOT_DIR") or os.path.join(".cache", "snapshot"),
+    # cat de des exportul din snapshot verifica si comenzile sterse (lista de _id)
+    reconcile_interval=int(config.get("SNAPSHOT_RECONCILE_SECONDS") or 3600),
+)
+# exporturi mari rulate in fundal, cu rezultatul pastrat pe disc
+export_jobs = ExportJobManager(
+    config.get("EXPORT_JOBS_DIR") or os.path.join(".cache", "exports"),
+    workers=int(config.get("EXPORT_JOB_WORKERS") or 2),
+    ttl=int(config.get("EXPORT_JOB_TTL_SECONDS") or 3600),
+)
+# exporturi randate complet, servite din nou cat timp amprenta datelor nu se schimba
+export_cache = ExportCache(
+    config.get("EXPORT_CACHE_DIR") or os.path.join(".cache", "export-cache"),
+    max_bytes=int(config.get("EXPORT_CACHE_BYTES") or 1024 * 1024 * 1024),
+)
+# cheie ceruta (id / _id / orderNumber) -> _id-ul documentului
+order_id_cache = LRUCache(int(config.get("ORDER_ID_CACHE_SIZE") or 4096))
+# rezultatele agregarilor de analytics (cheie = parametrii aliniati la bucket)
+analytics_cache = TTLCache(256, ttl=int(config.get("ANALYTICS_CACHE_TTL_SECONDS") or 60))
+
+
+async def ensure_order_indexes():
+    # idempotent: create_index nu face nimic daca indexul exista deja
+    if orders_collection is None:
+        return
+    try:
+        for keys in ORDER_INDEXES:
+            await orders_collection.create_index(keys)
+    except Exception as e:
+        print("Could not create order indexes:", e)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global render_executor, orders_collection
+    render_executor = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix="render")
+    # prima factura dupa deploy nu mai plateste incarcarea fonturilor/cache-urilor ReportLab
+    warm_up = await run_cpu(invoice_renderer.warm_up)
+    print(f"Invoice renderer warmed up in {warm_up * 1000:.0f} ms")
+    # clientul se conecteaza lenes: aplicatia serveste imediat, iar ping-ul si
+    # indexurile ruleaza in fundal (starea e raportata de /ready)
+    db.mongo.open(on_ready=ensure_order_indexes)
+    orders_collection = db.mongo.orders
+    yield
+    await db.mongo.close()
+    await export_jobs.shutdown()
+    render_executor.shutdown(wait=False)
+    if invoice_process_pool is not None:
+        invoice_process_pool.shutdown(wait=False, cancel_futures=True)
+    if export_process_pool is not None:
+        export_process_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _mongo_available():
+    # clientul exista si cand serverul nu raspunde; ping-ul din fundal decide,
+    # altfel cererea ar astepta serverSelectionTimeoutMS si ar intoarce 500
+    return orders_collection is not None and db.mongo.ready
+
+
+async def run_cpu(fn, *args):
+    # ruleaza munca CPU-bound in executorul dedicat, fara sa blocheze event loop-ul
+    return await asyncio.get_running_loop().run_in_executor(render_executor, fn, *args)
+
+
+def get_invoice_process_pool():
+    # pornit la prima cerere: procesele costa memorie si nu sunt necesare pentru facturi individuale
+    global invoice_process_pool
+    if invoice_process_pool is None:
+        invoice_process_pool = ProcessPoolExecutor(
+            max_workers=INVOICE_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return invoice_process_pool
+
+
+def get_export_process_pool():
+    # separat de procesele facturilor: un export paralel nu blocheaza /invoices.zip
+    global export_process_pool
+    if export_process_pool is None:
+        export_process_pool = ProcessPoolExecutor(
+            max_workers=EXPORT_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return export_process_pool
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,421 +169,662 @@ app.add_middleware(
     expose_headers=["Content-Disposition"],
 )
 
+@app.exception_handler(ServerSelectionTimeoutError)
+async def mongo_timeout_handler(request, exc):
+    # serverul a cazut intre doua ping-uri
+    return JSONResponse(
+        status_code=503,
+        content={"error": "MongoDB not available. Set MONGO_URI to your Atlas connection string in .env."}
+    )
 
-MONGO_URI = config.get("MONGO_URI")
-DB_NAME = config.get("DB_NAME")
-COLLECTION_NAME = config.get("COLLECTION_NAME")
+app.include_router(orders_router.router)
 
-# Create client only if MONGO_URI provided; use short serverSelectionTimeoutMS for fast failures
-client = None
-db = None
-orders_collection = None
-if MONGO_URI:
+
+async def _iter_order_batches(query=None, projection=None, batch_size=None, trace=None):
+    # cursorul aduce documentele de la server in loturi de batch_size
+    batch_size = batch_size or EXPORT_BATCH_SIZE
+    cursor = orders_collection.find(query or {}, projection, batch_size=batch_size)
+    try:
+        while True:
+            t0 = time.perf_counter()
+            batch = await cursor.to_list(batch_size)
+            if trace is not None:
+                trace.add("fetch", time.perf_counter() - t0)
+            if not batch:
+                break
+            yield batch
+    finally:
+        await cursor.close()
+
+def export_query(
+    orderDateFrom: Optional[datetime] = None,
+    orderDateTo: Optional[datetime] = None,
+    deliveryDateFrom: Optional[datetime] = None,
+    deliveryDateTo: Optional[datetime] = None,
+    status: Optional[List[str]] = Query(None),
+    paymentMethod: Optional[List[str]] = Query(None),
+    columns: Optional[str] = None,
+    source: Optional[str] = None,
+    layout: Optional[str] = None,
+    compress: Optional[str] = None,
+    parallel: bool = False,
+    splitBy: Optional[str] = None,
+    sheetBy: Optional[str] = None,
+):
+    # parametrii comuni ai endpoint-urilor de export; intervalele sunt [From, To)
+    return {
+        "filter": build_order_filter(
+            orderDateFrom, orderDateTo, deliveryDateFrom, deliveryDateTo, status, paymentMethod
+        ),
+        "columns": columns,
+        "source": source,
+        "layout": layout,
+        "compress": compress,
+        "parallel": parallel,
+        "splitBy": splitBy,
+        "sheetBy": sheetBy,
+    }
+
+def _encode_batch(encoder, docs, columns, trace, to_rows=normalize_orders):
+    if getattr(encoder, "raw_docs", False):
+        # Parquet/Arrow construiesc coloane tipizate direct din documente
+        with trace.stage("encode"):
+            return encoder.encode(docs)
+    with trace.stage("normalize"):
+        rows = to_rows(docs, columns)
+    with trace.stage("encode"):
+        return encoder.encode(rows)
+
+def _encode_rows(encoder, row_batches, trace):
+    # lotul urmator din snapshot + serializare, intr-un singur pas in executor
+    with trace.stage("read"):
+        rows = next(row_batches, None)
+    if rows is None:
+        return None
+    trace.add_rows(len(rows))
+    with trace.stage("encode"):
+        return encoder.encode(rows)
+
+async def _stream_export(encoder, query, projection, columns, trace, to_rows=normalize_orders):
+    # citirea din Mongo e asincrona; normalizarea si serializarea fiecarui lot
+    # ruleaza in executor, deci un export lent nu blocheaza restul API-ului.
+    # Fiecare lot produce un chunk (eventual gol), ca apelantul sa stie cand a fost procesat.
+    try:
+        chunk = await run_cpu(encoder.start)
+        trace.bytes += len(chunk)
+        yield chunk
+        async for docs in _iter_order_batches(query, projection, trace=trace):
+            chunk = await run_cpu(_encode_batch, encoder, docs, columns, trace, to_rows)
+            trace.add_rows(len(docs))
+            trace.bytes += len(chunk)
+            yield chunk
+        chunk = await run_cpu(encoder.finish)
+        trace.bytes += len(chunk)
+        yield chunk
+    finally:
+        trace.finish()
+
+async def _stream_snapshot_export(encoder, query, columns, trace):
+    try:
+        # doar delta fata de ultimul refresh vine din Mongo; restul se citeste local
+        t0 = time.perf_counter()
+        await order_snapshot.refresh(orders_collection, run_cpu, EXPORT_BATCH_SIZE)
+        trace.add("refresh", time.perf_counter() - t0)
+        row_batches = order_snapshot.iter_row_batches(query, columns, EXPORT_BATCH_SIZE)
+        chunk = await run_cpu(encoder.start)
+        trace.bytes += len(chunk)
+        yield chunk
+        while True:
+            chunk = await run_cpu(_encode_rows, encoder, row_batches, trace)
+            if chunk is None:
+                break
+            trace.bytes += len(chunk)
+            yield chunk
+        chunk = await run_cpu(encoder.finish)
+        trace.bytes += len(chunk)
+        yield chunk
+    finally:
+        trace.finish()
+
+async def _plan_partitions(query, plan, fmt):
+    # sheetBy=month: o partitie (si o foaie) pe luna; altfel intervale egale dupa esantion
+    if plan["sheetBy"] == "month":
+        return await month_partitions(orders_collection, query)
+    key = plan["splitBy"]
+    points = await sample_split_points(orders_collection, query, key, EXPORT_PARTITIONS)
+    partitions = range_partitions(query, key, points)
+    if fmt == "xlsx":
+        # intr-o singura foaie fiecare worker trebuie sa stie de la ce rand incepe
+        # secvential, ca la fingerprint: cu gather o eroare de conexiune lasa restul numararilor agatate
+        counts = []
+        for partition in partitions:
+            counts.append(await orders_collection.count_documents(partition["filter"]))
+        first_row = 2
+        for partition, count in zip(partitions, counts):
+            partition["first_row"] = first_row
+            # comenzile aparute intre numarare si citire nu pot depasi randurile rezervate
+            partition["limit"] = count
+            first_row += count
+        partitions = [p for p, count in zip(partitions, counts) if count]
+    return partitions
+
+async def _stream_parallel_export(merger, query, projection, columns, trace, plan, fmt):
+    # fiecare partitie e citita, normalizata si codificata intr-un proces worker,
+    # intr-un fisier temporar; parintele le trimite in ordinea cheii
+    loop = asyncio.get_running_loop()
+    workdir = None
+    futures = []
+    try:
+        t0 = time.perf_counter()
+        partitions = await _plan_partitions(query, plan, fmt)
+        trace.add("plan", time.perf_counter() - t0)
+        os.makedirs(EXPORT_SHARD_DIR, exist_ok=True)
+        workdir = tempfile.mkdtemp(dir=EXPORT_SHARD_DIR)
+        mongo = (db.mongo.uri, db.mongo.db_name, db.mongo.collection_name, db.mongo.client_options)
+        tasks = [{
+            "mongo": mongo,
+            "filter": partition["filter"],
+            "projection": projection,
+            "sort": partition["sort"],
+            "limit": partition.get("limit"),
+            "first_row": partition.get("first_row", 2),
+            "columns": columns,
+            "layout": plan["layout"],
+            "format": fmt,
+            "batch_size": EXPORT_BATCH_SIZE,
+            "path": os.path.join(workdir, f"{i:05d}.part"),
+        } for i, partition in enumerate(partitions)]
+
+        # cel mult 2 partitii in asteptare per proces: discul ocupat ramane limitat
+        pool = get_export_process_pool()
+        window = EXPORT_PROCESSES * 2
+
+        def submit(upto):
+            while len(futures) < min(upto, len(tasks)):
+                futures.append(loop.run_in_executor(pool, export_partition, tasks[len(futures)]))
+
+        chunk = await run_cpu(merger.start)
+        trace.bytes += len(chunk)
+        yield chunk
+        for i, (task, partition) in enumerate(zip(tasks, partitions)):
+            submit(i + window)
+            stats = await futures[i]
+            for stage in ("fetch", "normalize", "encode"):
+                trace.add(stage, stats[stage])
+            trace.add_rows(stats["orders"])
+            if partition["title"] is not None:
+                if not stats["rows"]:
+                    continue
+                chunk = await run_cpu(merger.open_sheet, partition["title"])
+                trace.bytes += len(chunk)
+                yield chunk
+            with open(task["path"], "rb") as f:
+                while True:
+                    with trace.stage("merge"):
+                        chunk = await run_cpu(merge_chunk, merger, f)
+                    if chunk is None:
+                        break
+                    trace.bytes += len(chunk)
+                    yield chunk
+            os.remove(task["path"])
+        chunk = await run_cpu(merger.finish)
+        trace.bytes += len(chunk)
+        yield chunk
+    finally:
+        for future in futures:
+            future.cancel()
+        if workdir is not None:
+            await loop.run_in_executor(None, lambda: shutil.rmtree(workdir, ignore_errors=True))
+        trace.finish()
+
+def _parallel_plan(params, fmt):
+    # None pentru exportul obisnuit; ValueError pentru combinatii nesuportate
+    if not params["parallel"] and params["sheetBy"] is None:
+        return None
+    if fmt not in ("csv", "xlsx"):
+        raise ValueError("parallel exports are only available for CSV/XLSX")
+    if params["source"] == "snapshot":
+        raise ValueError("parallel exports read live data; drop source=snapshot")
+    if params["sheetBy"] not in (None, "month"):
+        raise ValueError("sheetBy must be 'month'")
+    if params["sheetBy"] and fmt != "xlsx":
+        raise ValueError("sheetBy=month is only available for XLSX exports")
+    split_by = params["splitBy"] or "orderDate"
+    if split_by not in SPLIT_KEYS:
+        raise ValueError(f"splitBy must be one of: {', '.join(SPLIT_KEYS)}")
+    if params["sheetBy"] and split_by != "orderDate":
+        raise ValueError("sheetBy=month splits by orderDate")
+    layout = params["layout"] or "orders"
+    if layout == "lines" and fmt == "xlsx" and not params["sheetBy"]:
+        # randurile per produs nu pot fi numarate dinainte pentru o singura foaie
+        raise ValueError("parallel layout=lines XLSX exports need sheetBy=month")
+    return {"splitBy": split_by, "sheetBy": params["sheetBy"], "layout": layout}
+
+def _requested_codec(params, fmt):
+    # ?compress=gzip|zstd: fisierul descarcat e comprimat (comenzi.csv.gz)
+    compress = params["compress"]
+    if compress in (None, "none"):
+        return None
+    if compress not in COMPRESSION_CODECS:
+        raise ValueError(f"compress must be one of: none, {', '.join(COMPRESSION_CODECS)}")
+    if fmt != "csv":
+        raise ValueError("compress is only available for CSV exports")
+    return compress
+
+def _export_file(fmt, codec=None):
+    # (media type, nume fisier) pentru formatul cerut, eventual comprimat
+    _, media_type, filename = EXPORT_FORMATS[fmt]
+    if codec is None:
+        return media_type, filename
+    codec_media_type, ext = COMPRESSION_CODECS[codec]
+    return codec_media_type, filename + ext
+
+def _export_stream(params, fmt, trace, codec=None):
+    # filtrul si proiectia sunt aplicate pe server, deci doar campurile/documentele
+    # cerute ajung pe retea; ValueError pentru coloane necunoscute
+    encoder_cls = EXPORT_FORMATS[fmt][0]
+    plan = _parallel_plan(params, fmt)
+
+    def make_encoder(columns):
+        if plan is None:
+            encoder = encoder_cls(columns)
+        elif fmt == "xlsx":
+            encoder = XlsxMerger(columns, sheet_per_partition=plan["sheetBy"] is not None)
+        else:
+            encoder = CsvMerger(columns)
+        if codec is not None:
+            # compresia fiecarui chunk ruleaza in acelasi pas din executor ca serializarea
+            encoder = CompressedEncoder(encoder, codec, COMPRESSION_LEVELS[codec], trace)
+        return encoder
+
+    if params["layout"] == "lines":
+        # un rand per produs; randurile sunt construite din documentele brute
+        if getattr(encoder_cls, "raw_docs", False) or params["source"] == "snapshot":
+            raise ValueError("layout=lines is only available for live CSV/XLSX exports")
+        columns = parse_line_item_columns(params["columns"])
+        projection = line_item_projection(columns)
+        if plan is not None:
+            return _stream_parallel_export(make_encoder(columns), params["filter"], projection, columns, trace, plan, fmt)
+        return _stream_export(make_encoder(columns), params["filter"], projection, columns, trace, line_item_rows)
+    if params["layout"] not in (None, "orders"):
+        raise ValueError("layout must be 'orders' or 'lines'")
+    columns = parse_columns(params["columns"])
+    if params["source"] == "snapshot":
+        return _stream_snapshot_export(make_encoder(columns), params["filter"], columns, trace)
+    if params["source"] not in (None, "live"):
+        raise ValueError("source must be 'live' or 'snapshot'")
+    projection = build_projection(columns)
+    if plan is not None:
+        return _stream_parallel_export(make_encoder(columns), params["filter"], projection, columns, trace, plan, fmt)
+    return _stream_export(make_encoder(columns), params["filter"], projection, columns, trace)
+
+async def _skip_empty(head, stream):
+    for chunk in head:
+        if chunk:
+            yield chunk
+    async for chunk in stream:
+        if chunk:
+            yield chunk
+
+async def _export_fingerprint(query):
+    # inserarile schimba count/maxId, stergerile count, iar scrierile prin API updatedAt.
+    # count_documents e tot un $group peste potriviri: fara filtru se foloseste count-ul
+    # din metadatele colectiei, iar max updatedAt/_id sunt citiri de un document pe index.
+    # secvential: cu gather, o eroare de conexiune lasa celelalte cereri agatate pe client
+    query = query or {}
+    if query:
+        count = await orders_collection.count_documents(query)
+    else:
+        count = await orders_collection.estimated_document_count()
+    if not count:
+        return {"count": 0}
+    latest = await orders_collection.find(query, {"updatedAt": 1}).sort("updatedAt", -1).limit(1).to_list(1)
+    newest = await orders_collection.find(query, {"_id": 1}).sort("_id", -1).limit(1).to_list(1)
+    return {
+        "count": count,
+        "maxUpdatedAt": latest[0].get("updatedAt") if latest else None,
+        "maxId": newest[0]["_id"] if newest else None,
+    }
+
+async def _cache_export(chunks, writer, query, state):
+    # copia de pe disc e publicata doar daca exportul s-a terminat si datele
+    # nu s-au schimbat intre timp (altfel ar fi servita sub un ETag gresit)
+    loop = asyncio.get_running_loop()
+    committed = False
     try:
-        client = MongoClient(
-            MONGO_URI,
-            server_api=ServerApi("1"),
-            tls=True,
-            tlsCAFile=certifi.where(),
-            serverSelectionTimeoutMS=5000
+        async for chunk in chunks:
+            await loop.run_in_executor(None, writer.write, chunk)
+            yield chunk
+        if await _export_fingerprint(query) == state:
+            await loop.run_in_executor(None, writer.commit)
+            committed = True
+    finally:
+        if not committed:
+            await loop.run_in_executor(None, writer.discard)
+
+async def _export_response(params, fmt, if_none_match=None, accept_encoding=None):
+    if not _mongo_available():
+        return JSONResponse(
+            status_code=503,
+            content={"error": "MongoDB not available. Set MONGO_URI to your Atlas connection string in .env."}
         )
-        # verify connection
-        client.admin.command("ping")
-        print("Pinged your deployment. You successfully connected to MongoDB Atlas!")
-        db = client[DB_NAME] if DB_NAME else None
-        # evitam truth-testing pe obiecte pymongo; comparam explicit cu None
-        orders_collection = db[COLLECTION_NAME] if (db is not None and COLLECTION_NAME) else None
-    except Exception as e:
-        print("MongoDB connection failed:", e)
-        client = None
-        db = None
-        orders_collection = None
-else:
-    print("MONGO_URI not set in .env; skipping MongoDB connection.")
+
+    trace = ExportTrace(fmt, params["source"] or "live")
+    content_encoding = None
+    try:
+        codec = _requested_codec(params, fmt)
+        if params["compress"] is None and fmt == "csv":
+            # negociat din Accept-Encoding: acelasi comenzi.csv, comprimat doar pe retea
+            content_encoding = negotiate_encoding(accept_encoding)
+        stream = _export_stream(params, fmt, trace, codec or content_encoding)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    media_type, filename = _export_file(fmt, codec)
+
+    # amprenta ieftina a datelor filtrate: daca nu s-a schimbat nimic, clientul
+    # primeste 304 sau fisierul randat deja, fara sa deschidem cursorul de export
+    t0 = time.perf_counter()
+    state = await _export_fingerprint(params["filter"])
+    key = export_key(fmt, {**params, "contentEncoding": content_encoding})
+    etag = export_etag(key, state)
+    timing = {"fingerprint": time.perf_counter() - t0}
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "ETag": f'"{etag}"',
+    }
+    if fmt == "csv":
+        headers["Vary"] = "Accept-Encoding"
+    if content_encoding is not None:
+        headers["Content-Encoding"] = content_encoding
+    if etag_matches(if_none_match, etag):
+        EXPORT_CACHE.inc(result="not_modified")
+        not_modified = {k: v for k, v in headers.items() if k in ("ETag", "Vary")}
+        return Response(status_code=304, headers={**not_modified, "Server-Timing": server_timing(timing)})
+    ext = os.path.splitext(filename)[1]
+    if content_encoding is not None:
+        ext += COMPRESSION_CODECS[content_encoding][1]
+    cached = export_cache.get(key, etag, ext) if export_cache.enabled else None
+    if cached is not None:
+        return FileResponse(cached, media_type=media_type, headers={**headers, "Server-Timing": server_timing(timing)})
+    trace.add("fingerprint", timing["fingerprint"])
+
+    # primul lot e procesat inainte de headere: Server-Timing arata unde s-a dus
+    # timpul pana la primul octet (fetch / normalize / encode); totalurile sunt in /metrics
+    head = []
+    async for chunk in stream:
+        head.append(chunk)
+        if trace.rows:
+            break
+    body = _skip_empty(head, stream)
+    if export_cache.enabled:
+        writer = await asyncio.get_running_loop().run_in_executor(None, export_cache.writer, key, etag, ext)
+        body = _cache_export(body, writer, params["filter"], state)
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={**headers, "Server-Timing": trace.timing_header()},
+    )
+
+# format -> (encoder, media type, nume fisier)
+EXPORT_FORMATS = {
+    "xlsx": (XlsxEncoder, XLSX_MEDIA_TYPE, "comenzi.xlsx"),
+    "csv": (CsvEncoder, CSV_MEDIA_TYPE, "comenzi.csv"),
+    "parquet": (ParquetEncoder, PARQUET_MEDIA_TYPE, "comenzi.parquet"),
+    "arrow": (ArrowEncoder, ARROW_MEDIA_TYPE, "comenzi.arrow"),
+}
 
 @app.get("/")
-def home():
+async def home():
     return {"status": "Backend Python functioneaza!"}
 
-@app.get("/export-orders")
-def export_orders():
-    # Collection does not support truth-value testing — compare explicitly with None
-    if orders_collection is None:
-        return JSONResponse(
-            status_code=503,
-            content={"error": "MongoDB not available. Set MONGO_URI to your Atlas connection string in .env."}
-        )
+@app.get("/ready")
+async def ready():
+    # readiness: 200 doar dupa un ping reusit catre MongoDB
+    status = db.mongo.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content={"mongo": status})
 
-    # Citim documentele din MongoDB
-    raw_orders = list(orders_collection.find({}))  # include _id daca exista
-    rows = []
-    for doc in raw_orders:
-        # normalizeaza _id -> id
-        if "_id" in doc and "id" not in doc:
-            try:
-                doc["id"] = str(doc["_id"])
-            except Exception:
-                doc["id"] = doc["_id"]
-        # Convert datetimes to ISO strings (pydantic/Excel friendly)
-        if "orderDate" in doc and isinstance(doc["orderDate"], datetime):
-            doc["orderDate"] = doc["orderDate"].isoformat()
-        if "deliveryDate" in doc and isinstance(doc["deliveryDate"], datetime):
-            doc["deliveryDate"] = doc["deliveryDate"].isoformat()
-
-        # Ensure products is serializable; keep as list of dicts and stringify for Excel
-        products = doc.get("products", [])
-        try:
-            products_json = json.dumps(products, ensure_ascii=False)
-        except Exception:
-            products_json = str(products)
-
-        # Try to validate/normalize with OrderProps; if fails, fall back to raw mapping
-        try:
-            order = OrderProps.parse_obj(doc)
-            row = {
-                "id": order.id,
-                "userId": order.userId,
-                "orderNumber": order.orderNumber,
-                "clientName": order.clientName,
-                "clientEmail": order.clientEmail,
-                "clientPhone": order.clientPhone,
-                "clientAddress": order.clientAddress,
-                "orderDate": order.orderDate.isoformat() if isinstance(order.orderDate, datetime) else str(order.orderDate),
-                "deliveryDate": order.deliveryDate.isoformat() if isinstance(order.deliveryDate, datetime) else (str(order.deliveryDate) if order.deliveryDate else ""),
-                "info": order.info or "",
-                "status": order.status,
-                "totalPrice": order.totalPrice,
-                "paymentMethod": order.paymentMethod,
-                "products": json.dumps([p.dict() for p in order.products], ensure_ascii=False)
-            }
-        except Exception:
-            # fallback: use doc fields and stringify products
-            row = {
-                "id": doc.get("id", ""),
-                "userId": doc.get("userId", ""),
-                "orderNumber": doc.get("orderNumber", ""),
-                "clientName": doc.get("clientName", ""),
-                "clientEmail": doc.get("clientEmail", ""),
-                "clientPhone": doc.get("clientPhone", ""),
-                "clientAddress": doc.get("clientAddress", ""),
-                "orderDate": doc.get("orderDate", ""),
-                "deliveryDate": doc.get("deliveryDate", ""),
-                "info": doc.get("info", ""),
-                "status": doc.get("status", ""),
-                "totalPrice": doc.get("totalPrice", ""),
-                "paymentMethod": doc.get("paymentMethod", ""),
-                "products": products_json
-            }
+@app.get("/metrics")
+async def metrics():
+    # format text Prometheus
+    return Response(content=render_metrics(), media_type=METRICS_MEDIA_TYPE)
 
-        rows.append(row)
-
-    # Ordinea coloanelor conform OrderProps
-    columns = [
-        "id",
-        "userId",
-        "orderNumber",
-        "clientName",
-        "clientEmail",
-        "clientPhone",
-        "clientAddress",
-        "orderDate",
-        "deliveryDate",
-        "info",
-        "status",
-        "totalPrice",
-        "paymentMethod",
-        "products"
-    ]
-
-    df = pd.DataFrame(rows, columns=columns)
-
-    stream = BytesIO()
-    df.to_excel(stream, index=False, engine="openpyxl")
-    stream.seek(0)
+@app.get("/export-orders")
+async def export_orders(request: Request, params: dict = Depends(export_query)):
+    # Streaming: documentele sunt citite pe loturi si fiecare lot este scris
+    # imediat in workbook, deci memoria nu creste cu dimensiunea colectiei
+    return await _export_response(params, "xlsx", request.headers.get("if-none-match"))
 
-    return StreamingResponse(
-        stream,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": "attachment; filename=comenzi.xlsx"}
+@app.get("/export-orders.csv")
+async def export_orders_csv(request: Request, params: dict = Depends(export_query)):
+    # fiecare lot de documente e codificat si trimis imediat,
+    # fara DataFrame intermediar (UTF-8 with BOM, excel-friendly);
+    # gzip/zstd dupa Accept-Encoding sau ?compress=
+    return await _export_response(
+        params, "csv", request.headers.get("if-none-match"), request.headers.get("accept-encoding")
     )
 
-def _build_orders_df():
-    raw_orders = list(orders_collection.find({}))
-    rows = []
-    for doc in raw_orders:
-        if "_id" in doc and "id" not in doc:
-            try:
-                doc["id"] = str(doc["_id"])
-            except Exception:
-                doc["id"] = doc["_id"]
-
-        if "orderDate" in doc and isinstance(doc["orderDate"], datetime):
-            doc["orderDate"] = doc["orderDate"].isoformat()
-        if "deliveryDate" in doc and isinstance(doc["deliveryDate"], datetime):
-            doc["deliveryDate"] = doc["deliveryDate"].isoformat()
-
-        products = doc.get("products", [])
-        try:
-            products_json = json.dumps(products, ensure_ascii=False)
-        except Exception:
-            products_json = str(products)
-
-        try:
-            order = OrderProps.parse_obj(doc)
-            row = {
-                "id": order.id,
-                "userId": order.userId,
-                "orderNumber": order.orderNumber,
-                "clientName": order.clientName,
-                "clientEmail": order.clientEmail,
-                "clientPhone": order.clientPhone,
-                "clientAddress": order.clientAddress,
-                "orderDate": order.orderDate.isoformat() if isinstance(order.orderDate, datetime) else str(order.orderDate),
-                "deliveryDate": order.deliveryDate.isoformat() if isinstance(order.deliveryDate, datetime) else (str(order.deliveryDate) if order.deliveryDate else ""),
-                "info": order.info or "",
-                "status": order.status,
-                "totalPrice": order.totalPrice,
-                "paymentMethod": order.paymentMethod,
-                "products": json.dumps([p.dict() for p in order.products], ensure_ascii=False)
-            }
-        except Exception:
-            row = {
-                "id": doc.get("id", ""),
-                "userId": doc.get("userId", ""),
-                "orderNumber": doc.get("orderNumber", ""),
-                "clientName": doc.get("clientName", ""),
-                "clientEmail": doc.get("clientEmail", ""),
-                "clientPhone": doc.get("clientPhone", ""),
-                "clientAddress": doc.get("clientAddress", ""),
-                "orderDate": doc.get("orderDate", ""),
-                "deliveryDate": doc.get("deliveryDate", ""),
-                "info": doc.get("info", ""),
-                "status": doc.get("status", ""),
-                "totalPrice": doc.get("totalPrice", ""),
-                "paymentMethod": doc.get("paymentMethod", ""),
-                "products": products_json
-            }
+@app.get("/export-orders.parquet")
+async def export_orders_parquet(request: Request, params: dict = Depends(export_query)):
+    # coloane tipizate (timestamp, float, dictionary pentru status/paymentMethod);
+    # row group-urile sunt trimise pe masura ce se umplu
+    return await _export_response(params, "parquet", request.headers.get("if-none-match"))
 
-        rows.append(row)
-
-    columns = [
-        "id",
-        "userId",
-        "orderNumber",
-        "clientName",
-        "clientEmail",
-        "clientPhone",
-        "clientAddress",
-        "orderDate",
-        "deliveryDate",
-        "info",
-        "status",
-        "totalPrice",
-        "paymentMethod",
-        "products"
-    ]
-
-    df = pd.DataFrame(rows, columns=columns)
-    return df
+@app.get("/export-orders.arrow")
+async def export_orders_arrow(request: Request, params: dict = Depends(export_query)):
+    # Arrow IPC stream: un record batch per lot citit din Mongo
+    return await _export_response(params, "arrow", request.headers.get("if-none-match"))
 
-@app.get("/export-orders.csv")
-def export_orders_csv():
-    if orders_collection is None:
+@app.post("/export-jobs", status_code=202)
+async def create_export_job(format: str = "xlsx", params: dict = Depends(export_query)):
+    if not _mongo_available():
         return JSONResponse(
             status_code=503,
             content={"error": "MongoDB not available. Set MONGO_URI to your Atlas connection string in .env."}
         )
-
-    df = _build_orders_df()
-
-    stream = BytesIO()
-    # UTF-8 with BOM (excel-friendly), without index column
-    df.to_csv(stream, index=False, encoding="utf-8-sig")
-    stream.seek(0)
-
-    return StreamingResponse(
-        stream,
-        media_type="text/csv; charset=utf-8",
-        headers={"Content-Disposition": "attachment; filename=comenzi.csv"}
+    if format not in EXPORT_FORMATS:
+        return JSONResponse(status_code=400, content={"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"})
+    source = params["source"] or "live"
+    try:
+        # coloanele, sursa si compresia sunt validate acum, nu abia in job
+        codec = _requested_codec(params, format)
+        _export_stream(params, format, ExportTrace(format, source), codec)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    media_type, filename = _export_file(format, codec)
+
+    # cereri identice (format + filtre) cat timp job-ul ruleaza primesc acelasi job
+    key = json.dumps({"format": format, **params}, sort_keys=True, default=str)
+    job, _ = export_jobs.submit(
+        key,
+        filename,
+        media_type,
+        lambda on_rows: _export_stream(params, format, ExportTrace(format, source, on_rows), codec),
+        lambda: orders_collection.count_documents(params["filter"]),
     )
+    return {**job.to_dict(), "url": f"/export-jobs/{job.id}", "download": f"/export-jobs/{job.id}/download"}
+
+@app.get("/export-jobs/{job_id}")
+async def get_export_job(job_id: str):
+    job = export_jobs.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Export job not found"})
+    result = job.to_dict()
+    if job.status == "done":
+        result["download"] = f"/export-jobs/{job.id}/download"
+    return result
+
+@app.get("/export-jobs/{job_id}/download")
+async def download_export_job(job_id: str):
+    job = export_jobs.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Export job not found"})
+    if job.status != "done":
+        return JSONResponse(status_code=409, content={"error": f"Export job is {job.status}"})
+    return FileResponse(job.path, media_type=job.media_type, filename=job.filename)
+
+async def _aggregate(pipeline):
+    cursor = await orders_collection.aggregate(pipeline)
+    try:
+        return format_buckets(await cursor.to_list(None))
+    finally:
+        await cursor.close()
+
+@app.get("/analytics/revenue")
+async def revenue_analytics(
+    groupBy: str = "day",
+    orderDateFrom: Optional[datetime] = None,
+    orderDateTo: Optional[datetime] = None,
+    status: Optional[List[str]] = Query(None),
+    paymentMethod: Optional[List[str]] = Query(None),
+):
+    if not _mongo_available():
+        return JSONResponse(
+            status_code=503,
+            content={"error": "MongoDB not available. Set MONGO_URI to your Atlas connection string in .env."}
+        )
+    orderDateFrom, orderDateTo = align_range(orderDateFrom, orderDateTo, groupBy)
+    query = build_order_filter(orderDateFrom, orderDateTo, status=status, payment_method=paymentMethod)
+    try:
+        pipeline = build_revenue_pipeline(groupBy, query)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    key = json.dumps({"groupBy": groupBy, "filter": query}, sort_keys=True, default=str)
+    # in cache se pastreaza task-ul, deci cererile simultane asteapta aceeasi agregare
+    task = analytics_cache.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_aggregate(pipeline))
+        analytics_cache.set(key, task)
+    try:
+        buckets = await asyncio.shield(task)
+    except Exception:
+        analytics_cache.pop(key)
+        raise
+    return {
+        "groupBy": groupBy,
+        "orderDateFrom": orderDateFrom,
+        "orderDateTo": orderDateTo,
+        "buckets": buckets,
+    }
+
+@app.post("/snapshot/refresh")
+async def refresh_snapshot():
+    if not _mongo_available():
+        return JSONResponse(
+            status_code=503,
+            content={"error": "MongoDB not available. Set MONGO_URI to your Atlas connection string in .env."}
+        )
+    # refresh explicit: verifica si stergerile, indiferent de interval
+    return await order_snapshot.refresh(orders_collection, run_cpu, EXPORT_BATCH_SIZE, reconcile_deletes=True)
+
+async def resolve_order(order_id):
+    # 1) cache: cheia a mai fost rezolvata -> o singura cautare dupa _id
+    canonical_id = order_id_cache.get(order_id)
+    if canonical_id is not None:
+        order_doc = await orders_collection.find_one({"_id": canonical_id})
+        if order_doc is not None:
+            return order_doc
+        order_id_cache.pop(order_id)
+
+    # 2) un singur $or cu toate interpretarile valide ale cheii (id, _id, orderNumber);
+    # daca se potrivesc mai multe documente, pastram prioritatea cautarilor vechi
+    clauses = order_key_clauses(order_id)
+    candidates = await orders_collection.find({"$or": clauses}).limit(MAX_CANDIDATES).to_list(MAX_CANDIDATES)
+    order_doc = pick_order(candidates, clauses)
+    if order_doc is not None:
+        order_id_cache.set(order_id, order_doc["_id"])
+    return order_doc
 
 @app.get("/orders/{order_id}/invoice.pdf")
-def download_invoice(order_id: str):
-    if orders_collection is None:
+async def download_invoice(order_id: str):
+    if not _mongo_available():
         return JSONResponse(
             status_code=503,
             content={"error": "MongoDB not available. Set MONGO_URI to your Atlas connection string in .env."}
         )
 
-    # cautari posibile (în ordinea asta)
-    tried = []
-    order_doc = None
-
-    # 1) câmp custom "id" (string UUID sau alt string)
-    tried.append({"id": order_id})
-    order_doc = orders_collection.find_one({"id": order_id})
-
-    # 2) _id ca string (uneori _id este stocat ca string)
-    if order_doc is None:
-        tried.append({"_id": order_id})
-        order_doc = orders_collection.find_one({"_id": order_id})
-
-    # 3) _id ca ObjectId (daca order_id e un ObjectId valid)
-    if order_doc is None:
-        try:
-            oid = ObjectId(order_id)
-            tried.append({"_id": f"ObjectId('{order_id}')"})
-            order_doc = orders_collection.find_one({"_id": oid})
-        except Exception:
-            # nu e ObjectId valid
-            pass
-
-    # 4) orderNumber (daca ai trimis numarul comenzii în URL)
-    if order_doc is None:
-        try:
-            maybe_num = int(order_id)
-            tried.append({"orderNumber": maybe_num})
-            order_doc = orders_collection.find_one({"orderNumber": maybe_num})
-        except Exception:
-            pass
-
-    # debug: log interogarile
-    print("invoice lookup tried:", tried, "found:", bool(order_doc))
-
+    t0 = time.perf_counter()
+    order_doc = await resolve_order(order_id)
+    lookup = time.perf_counter() - t0
+    INVOICE_STAGE.observe(lookup, stage="lookup")
     if not order_doc:
         # return mai informativ pentru depanare (fara date sensibile)
         return JSONResponse(
             status_code=404,
             content={
                 "error": "Order not found",
-                "tried": tried
+                "tried": describe_clauses(order_key_clauses(order_id))
             }
         )
 
-    if "_id" in order_doc and "id" not in order_doc:
-        try:
-            order_doc["id"] = str(order_doc["_id"])
-        except Exception:
-            order_doc["id"] = order_doc["_id"]
-    if "orderDate" in order_doc and isinstance(order_doc["orderDate"], datetime):
-        order_doc["orderDate"] = order_doc["orderDate"].isoformat()
-    if "deliveryDate" in order_doc and isinstance(order_doc["deliveryDate"], datetime):
-        order_doc["deliveryDate"] = order_doc["deliveryDate"].isoformat()
-
-    # build PDF
-    from reportlab.lib.pagesizes import A4
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib import colors
-    from reportlab.lib.units import mm
-
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, leftMargin=15*mm, rightMargin=15*mm, topMargin=15*mm, bottomMargin=15*mm)
-    styles = getSampleStyleSheet()
-    title_style = styles["Title"]
-    normal = styles["Normal"]
-    small = ParagraphStyle("small", parent=styles["Normal"], fontSize=8, leading=10)
-    heading = ParagraphStyle("heading", parent=styles["Heading2"], spaceAfter=6)
-
-    story = []
-
-    # Company block (header)
-    company_name = "BUCHETUL SIMONEI POEZIA FLORILOR SRL"
-    company_addr = "jud. Neamt, sat Tamaseni, Str. Unirii 224, Cod 617465"
-    company_reg = "Înregistrare la Registrul Comertului: J27/802/2016, CUI: 36497181"
-    company_contact = "Contact: laurasimona97@yahoo.com — Tel: 0769141250"
-    site_info = "www.buchetul-simonei.com"
-
-    story.append(Paragraph(company_name, ParagraphStyle("cname", parent=styles["Heading1"], fontSize=14)))
-    story.append(Paragraph(company_addr, small))
-    story.append(Paragraph(company_reg, small))
-    story.append(Paragraph(company_contact, small))
-    story.append(Paragraph(site_info, small))
-    story.append(Spacer(1, 8))
-
-    # Invoice title + meta
-    story.append(Paragraph("FACTURA", title_style))
-    story.append(Spacer(1, 6))
-    story.append(Paragraph(f"Numar comanda: <b>{order_doc.get('orderNumber','')}</b>", normal))
-    story.append(Paragraph(f"ID comanda: {order_doc.get('id','')}", normal))
-    story.append(Paragraph(f"Data comanda: {order_doc.get('orderDate','')}", normal))
-    story.append(Spacer(1, 8))
-
-    # Client info
-    story.append(Paragraph("<b>Date client</b>", heading))
-    story.append(Paragraph(f"Nume: {order_doc.get('clientName','')}", normal))
-    story.append(Paragraph(f"Email: {order_doc.get('clientEmail','')}", normal))
-    story.append(Paragraph(f"Telefon: {order_doc.get('clientPhone','')}", normal))
-    story.append(Paragraph(f"Adresa: {order_doc.get('clientAddress','')}", normal))
-    story.append(Spacer(1, 8))
-
-    # Products table
-    prod_header = ["#", "Produs", "Cant.", "Pret unitar", "Subtotal"]
-    table_data = [prod_header]
-    products = order_doc.get("products", []) or []
-    total = 0.0
-    for i, p in enumerate(products, start=1):
-        title = p.get("title") if isinstance(p, dict) else getattr(p, "title", str(p))
-        qty = p.get("quantity", 0) if isinstance(p, dict) else getattr(p, "quantity", 0)
-        price = p.get("price", 0.0) if isinstance(p, dict) else getattr(p, "price", 0.0)
-        try:
-            subtotal = float(price) * int(qty)
-        except Exception:
-            subtotal = 0.0
-        total += subtotal
-        table_data.append([str(i), title, str(qty), f"{price:.2f}", f"{subtotal:.2f}"])
-
-    # VAT and totals
-    vat_rate = 0.21
-    vat_amount = total * vat_rate
-    total_with_vat = total
-
-    table_data.append(["", "", "", "Subtotal", f"{total:.2f}"])
-    table_data.append(["", "", "", f"TVA {int(vat_rate*100)}%", f"{vat_amount:.2f}"])
-    table_data.append(["", "", "", "Total (cu TVA)", f"{total_with_vat:.2f}"])
-
-    col_widths = [10*mm, 95*mm, 20*mm, 30*mm, 30*mm]
-    table = Table(table_data, colWidths=col_widths, hAlign="LEFT")
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#eeeeee")),
-        ("TEXTCOLOR", (0,0), (-1,0), colors.black),
-        ("ALIGN", (2,1), (-1,-1), "RIGHT"),
-        ("GRID", (0,0), (-1,-1), 0.4, colors.grey),
-        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-        ("BACKGROUND", (0,-3), (-1,-1), colors.HexColor("#fafafa")),
-    ]))
-
-    story.append(table)
-    story.append(Spacer(1, 10))
-
-    # Additional info and payment method
-    story.append(Paragraph(f"Informatii comanda: {order_doc.get('info','')}", normal))
-    story.append(Paragraph(f"Metoda plata: {order_doc.get('paymentMethod','')}", normal))
-    story.append(Spacer(1, 8))
-
-    # Legal / contact footer block
-    legal_text = (
-        "Site-ul www.buchetul-simonei.com este detinut si operat de BUCHETUL SIMONEI POEZIA FLORILOR SRL, "
-        "cu sediul în judetul Neamt, sat Tamaseni, Str. Unirii 224, Cod 617465. "
-        "Înregistrare la Registrul Comertului: J27/802/2016, CUI: 36497181."
+    prepare_order_doc(order_doc)
+
+    # randarea PDF e CPU-bound: o mutam in executor
+    t0 = time.perf_counter()
+    pdf = await run_cpu(_cached_invoice_pdf, order_doc)
+    render = time.perf_counter() - t0
+    INVOICE_STAGE.observe(render, stage="render")
+    return Response(
+        content=pdf,
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f"attachment; filename=invoice_{order_doc.get('id','')}.pdf",
+            # render include si cautarea in cache (hit: sub o milisecunda)
+            "Server-Timing": server_timing({"lookup": lookup, "render": render}),
+        }
     )
-    story.append(Paragraph(legal_text, small))
-    story.append(Spacer(1, 4))
-    story.append(Paragraph("Date de contact operator:", ParagraphStyle("foot_h", parent=styles["Heading4"], fontSize=9)))
-    story.append(Paragraph("BUCHETUL SIMONEI POEZIA FLORILOR SRL", small))
-    story.append(Paragraph(company_addr, small))
-    story.append(Paragraph(f"Email: {company_contact.split('—')[0].strip()}", small))
-    story.append(Paragraph(f"Telefon: {company_contact.split('—')[-1].strip()}", small))
-    story.append(Spacer(1, 6))
 
-    # Thank you footer
-    story.append(Paragraph("Multumim pentru comanda!", ParagraphStyle("center", parent=normal, alignment=1)))
+def _cached_invoice_pdf(order_doc):
+    # cheia include hash-ul campurilor de pe factura: o comanda modificata e re-randata automat
+    cache_key = str(order_doc.get("_id", order_doc.get("id", "")))
+    digest = invoice_digest(order_doc)
+    pdf = invoice_cache.get(cache_key, digest)
+    if pdf is None:
+        pdf = invoice_renderer.render(order_doc)
+        invoice_cache.put(cache_key, digest, pdf)
+    return pdf
+
+async def _render_invoice_in_pool(order_doc):
+    cache_key = str(order_doc.get("_id", order_doc.get("id", "")))
+    digest = invoice_digest(order_doc)
+    pdf = await run_cpu(invoice_cache.get, cache_key, digest)
+    if pdf is None:
+        loop = asyncio.get_running_loop()
+        pdf = await loop.run_in_executor(get_invoice_process_pool(), render_invoice, invoice_payload(order_doc))
+        await run_cpu(invoice_cache.put, cache_key, digest, pdf)
+    return pdf
+
+async def _prepared_batches(query):
+    async for docs in _iter_order_batches(query, batch_size=INVOICE_PROCESSES * 4):
+        yield [prepare_order_doc(doc) for doc in docs]
+
+@app.get("/invoices.zip")
+async def download_invoices(
+    orderDateFrom: Optional[datetime] = None,
+    orderDateTo: Optional[datetime] = None,
+    status: Optional[List[str]] = Query(None),
+    ids: Optional[List[str]] = Query(None),
+):
+    if not _mongo_available():
+        return JSONResponse(
+            status_code=503,
+            content={"error": "MongoDB not available. Set MONGO_URI to your Atlas connection string in .env."}
+        )
 
-    doc.build(story)
+    query = build_order_filter(orderDateFrom, orderDateTo, status=status)
+    if ids:
+        # fiecare cheie poate fi id, _id sau orderNumber: un singur $or pentru toate
+        query["$or"] = [clause for order_id in ids for clause in order_key_clauses(order_id)]
+    if not query:
+        return JSONResponse(
+            status_code=400,
+            content={"error": "Specify a date range, a status or a list of ids."}
+        )
 
-    buffer.seek(0)
+    # o singura interogare; facturile sunt randate in procese separate si scrise in
+    # arhiva pe masura ce sunt gata, cu un numar limitat de randari in asteptare
     return StreamingResponse(
-        buffer,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=invoice_{order_doc.get('id','')}.pdf"}
-    )
\ No newline at end of file
+        stream_invoice_zip(_prepared_batches(query), _render_invoice_in_pool, max_in_flight=INVOICE_PROCESSES * 2),
+        media_type=ZIP_MEDIA_TYPE,
+        headers={"Content-Disposition": "attachment; filename=facturi.zip"}
+    )
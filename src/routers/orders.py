@@ -1,40 +1,251 @@
-from fastapi import APIRouter, HTTPException
-from pymongo import MongoClient
+import asyncio
+import base64
+import binascii
+from datetime import datetime, timezone
+from typing import List, Optional
+import orjson
+from fastapi import APIRouter, HTTPException, Query
 from bson import ObjectId
-from src.db import get_database
-from src.schemas.order import Order, OrderIn
+from bson.errors import InvalidId
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from src.db import get_orders_collection
+from src.schemas.order import BulkOrdersIn, Order, OrderIn
+from src.utils.fastjson import FastJSONResponse
+from src.utils.invoice_cache import invoice_cache
+from src.utils.query import build_order_filter, parse_columns
 
 router = APIRouter()
 
+# operatii per apel bulk_write si apeluri in paralel; limita pe cerere
+BULK_CHUNK_SIZE = 500
+BULK_CONCURRENCY = 4
+BULK_MAX_OPERATIONS = 10000
+# marimea paginii pentru GET /orders
+LIST_DEFAULT_LIMIT = 50
+LIST_MAX_LIMIT = 500
+
+def _orders():
+    # acelasi client (si pool) ca exporturile si facturile
+    orders = get_orders_collection()
+    if orders is None:
+        raise HTTPException(status_code=503, detail="MongoDB not available")
+    return orders
+
+def _encode_cursor(doc):
+    order_date = doc.get("orderDate")
+    key = {
+        "d": order_date.isoformat() if isinstance(order_date, datetime) else None,
+        "i": str(doc["_id"]),
+    }
+    return base64.urlsafe_b64encode(orjson.dumps(key)).decode("ascii")
+
+def _decode_cursor(cursor):
+    # cursorul e opac pentru client: ultima pereche (orderDate, _id) din pagina
+    try:
+        key = orjson.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        order_date = datetime.fromisoformat(key["d"]) if key["d"] is not None else None
+        order_id = ObjectId(key["i"]) if ObjectId.is_valid(key["i"]) else key["i"]
+    except (binascii.Error, orjson.JSONDecodeError, KeyError, TypeError, ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return order_date, order_id
+
+def _and(query, condition):
+    return {"$and": [query, condition]} if query else condition
+
+def _after_cursor(order_date, order_id, descending):
+    """Filter for the orders strictly after (orderDate, _id) in the listing order.
+
+    A cursor without ``orderDate`` points into the undated section, listed by ``_id``.
+    """
+    op = "$lt" if descending else "$gt"
+    if order_date is None:
+        return {"_id": {op: order_id}}
+    return {"$or": [{"orderDate": {op: order_date}}, {"orderDate": order_date, "_id": {op: order_id}}]}
+
+@router.get("/orders")
+async def list_orders(
+    orderDateFrom: Optional[datetime] = None,
+    orderDateTo: Optional[datetime] = None,
+    deliveryDateFrom: Optional[datetime] = None,
+    deliveryDateTo: Optional[datetime] = None,
+    status: Optional[List[str]] = Query(None),
+    paymentMethod: Optional[List[str]] = Query(None),
+    columns: Optional[str] = None,
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+):
+    """Orders sorted by (orderDate, _id), one keyset page at a time.
+
+    Each page is a single indexed range scan (no skip), so deep pages cost
+    the same as the first one. Pass ``nextCursor`` back as ``cursor``.
+    Orders whose ``orderDate`` is missing or not a date come last, by ``_id``.
+    """
+    orders = _orders()
+    try:
+        selected = parse_columns(columns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    query = build_order_filter(
+        orderDateFrom, orderDateTo, deliveryDateFrom, deliveryDateTo, status, paymentMethod
+    )
+    descending = order == "desc"
+    order_date, order_id = _decode_cursor(cursor) if cursor else (None, None)
+    after = _after_cursor(order_date, order_id, descending) if cursor else None
+    # orderDate si _id formeaza cursorul, deci sunt mereu returnate
+    projection = None if columns is None else {**{c: 1 for c in selected}, "orderDate": 1, "_id": 1}
+    direction = -1 if descending else 1
+
+    # comparatiile pe orderDate nu trec peste tipuri BSON (null, string), deci cursorul
+    # (orderDate, _id) acopera doar datele reale; restul vin intr-o sectiune separata
+    docs = []
+    if not cursor or order_date is not None:
+        dated = _and(query, {"orderDate": {"$type": "date"}})
+        # limit + 1: documentul in plus spune daca exista o pagina urmatoare
+        docs = await orders.find(_and(dated, after) if after else dated, projection).sort(
+            [("orderDate", direction), ("_id", direction)]
+        ).limit(limit + 1).to_list(limit + 1)
+    if len(docs) <= limit:
+        undated = _and(query, {"orderDate": {"$not": {"$type": "date"}}})
+        if cursor and order_date is None:
+            undated = _and(undated, after)
+        rest = limit + 1 - len(docs)
+        docs += await orders.find(undated, projection).sort("_id", direction).limit(rest).to_list(rest)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = _encode_cursor(docs[-1])
+    # documentele merg direct la orjson, fara Order/jsonable_encoder per element
+    return FastJSONResponse({"items": docs, "nextCursor": next_cursor})
+
 @router.post("/orders", response_model=Order)
-def create_order(order: OrderIn):
-    db = get_database()
+async def create_order(order: OrderIn):
+    orders = _orders()
     order_dict = order.dict()
-    result = db.orders.insert_one(order_dict)
+    # watermark pentru refresh-ul incremental al snapshot-ului
+    order_dict["updatedAt"] = datetime.now(timezone.utc)
+    result = await orders.insert_one(order_dict)
     order_dict["_id"] = str(result.inserted_id)
     return order_dict
 
 @router.get("/orders/{order_id}", response_model=Order)
-def read_order(order_id: str):
-    db = get_database()
-    order = db.orders.find_one({"_id": ObjectId(order_id)})
+async def read_order(order_id: str):
+    orders = _orders()
+    order = await orders.find_one({"_id": ObjectId(order_id)})
     if order is None:
         raise HTTPException(status_code=404, detail="Order not found")
     order["_id"] = str(order["_id"])
     return order
 
 @router.put("/orders/{order_id}", response_model=Order)
-def update_order(order_id: str, order: OrderIn):
-    db = get_database()
-    result = db.orders.update_one({"_id": ObjectId(order_id)}, {"$set": order.dict()})
+async def update_order(order_id: str, order: OrderIn):
+    orders = _orders()
+    changes = order.dict()
+    changes["updatedAt"] = datetime.now(timezone.utc)
+    result = await orders.update_one({"_id": ObjectId(order_id)}, {"$set": changes})
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Order not found or no changes made")
-    return read_order(order_id)
+    # facturile randate pentru versiunea veche nu mai sunt valide (stergere de pe disc)
+    await asyncio.to_thread(invoice_cache.invalidate, order_id)
+    return await read_order(order_id)
 
 @router.delete("/orders/{order_id}")
-def delete_order(order_id: str):
-    db = get_database()
-    result = db.orders.delete_one({"_id": ObjectId(order_id)})
+async def delete_order(order_id: str):
+    orders = _orders()
+    result = await orders.delete_one({"_id": ObjectId(order_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Order not found")
-    return {"detail": "Order deleted successfully"}
\ No newline at end of file
+    await asyncio.to_thread(invoice_cache.invalidate, order_id)
+    return {"detail": "Order deleted successfully"}
+
+
+async def _run_bulk_chunk(orders, chunk, semaphore):
+    # chunk: lista de (operatie, rezultat); rezultatele sunt completate pe loc
+    async with semaphore:
+        try:
+            await orders.bulk_write([op for op, _ in chunk], ordered=False)
+        except BulkWriteError as e:
+            # unordered: restul operatiilor din chunk au fost aplicate
+            for error in e.details.get("writeErrors", []):
+                result = chunk[error["index"]][1]
+                result["status"] = "error"
+                result["error"] = error.get("errmsg", "write error")
+        except Exception as e:
+            for _, result in chunk:
+                result["status"] = "error"
+                result["error"] = str(e)
+
+@router.post("/orders/bulk")
+async def bulk_orders(batch: BulkOrdersIn):
+    orders = _orders()
+    total = len(batch.create) + len(batch.update) + len(batch.delete)
+    if total == 0:
+        raise HTTPException(status_code=400, detail="Nothing to do: send create, update and/or delete items")
+    if total > BULK_MAX_OPERATIONS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_OPERATIONS} operations per request")
+
+    now = datetime.now(timezone.utc)
+    results = []
+    pending = []
+    created_docs = []
+    for i, order in enumerate(batch.create):
+        doc = order.dict()
+        doc["updatedAt"] = now
+        result = {"op": "create", "index": i, "status": "created"}
+        results.append(result)
+        pending.append((InsertOne(doc), result))
+        created_docs.append((doc, result))
+
+    # update/delete: id-urile invalide sau inexistente sunt raportate per element
+    keyed = []
+    for op, items in (("update", batch.update), ("delete", batch.delete)):
+        for i, item in enumerate(items):
+            order_id = item.id if op == "update" else item
+            result = {"op": op, "index": i, "id": order_id}
+            results.append(result)
+            try:
+                oid = ObjectId(order_id)
+            except (InvalidId, TypeError):
+                result["status"] = "invalid_id"
+                continue
+            if op == "update":
+                changes = item.changes.dict(exclude_unset=True)
+                if not changes:
+                    result["status"] = "no_changes"
+                    continue
+                changes["updatedAt"] = now
+                request = UpdateOne({"_id": oid}, {"$set": changes})
+            else:
+                request = DeleteOne({"_id": oid})
+            keyed.append((oid, request, result))
+
+    if keyed:
+        # un singur find pentru toate cheile, ca "not_found" sa fie raportat per element
+        ids = list({oid for oid, _, _ in keyed})
+        existing = {doc["_id"] async for doc in orders.find({"_id": {"$in": ids}}, {"_id": 1})}
+        for oid, request, result in keyed:
+            if oid in existing:
+                result["status"] = "updated" if result["op"] == "update" else "deleted"
+                pending.append((request, result))
+            else:
+                result["status"] = "not_found"
+
+    semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+    await asyncio.gather(*(
+        _run_bulk_chunk(orders, pending[start:start + BULK_CHUNK_SIZE], semaphore)
+        for start in range(0, len(pending), BULK_CHUNK_SIZE)
+    ))
+    for doc, result in created_docs:
+        if result["status"] == "created":
+            result["id"] = str(doc["_id"])
+
+    # facturile comenzilor modificate/sterse nu mai sunt valide
+    touched = [r["id"] for r in results if r["status"] in ("updated", "deleted")]
+    if touched:
+        await asyncio.to_thread(lambda: [invoice_cache.invalidate(order_id) for order_id in touched])
+
+    summary = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    return {"summary": summary, "results": results}
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, validator
 from typing import Optional, List, Literal
 from datetime import datetime
 
@@ -32,3 +32,66 @@ class OrderProps(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class OrderIn(BaseModel):
+    userId: str
+    orderNumber: int
+    clientName: str
+    clientEmail: str
+    clientPhone: str
+    clientAddress: str
+    orderDate: datetime
+    deliveryDate: Optional[datetime] = None
+    info: Optional[str] = None
+    status: Literal["Pending", "Processing", "Delivered", "Cancelled"]
+    totalPrice: float
+    paymentMethod: Literal["ramburs", "card"]
+    products: List[OrderProductProps]
+
+
+class Order(OrderIn):
+    id: str = Field(alias="_id")
+
+    class Config:
+        allow_population_by_field_name = True
+
+
+class OrderPatch(BaseModel):
+    # toate campurile optionale: se scriu doar cele trimise
+    userId: Optional[str] = None
+    orderNumber: Optional[int] = None
+    clientName: Optional[str] = None
+    clientEmail: Optional[str] = None
+    clientPhone: Optional[str] = None
+    clientAddress: Optional[str] = None
+    orderDate: Optional[datetime] = None
+    deliveryDate: Optional[datetime] = None
+    info: Optional[str] = None
+    status: Optional[Literal["Pending", "Processing", "Delivered", "Cancelled"]] = None
+    totalPrice: Optional[float] = None
+    paymentMethod: Optional[Literal["ramburs", "card"]] = None
+    products: Optional[List[OrderProductProps]] = None
+
+    @validator(
+        "userId", "orderNumber", "clientName", "clientEmail", "clientPhone", "clientAddress",
+        "orderDate", "status", "totalPrice", "paymentMethod", "products",
+        pre=True,
+    )
+    def _not_null(cls, value):
+        # campurile obligatorii in OrderIn pot lipsi, dar nu pot fi sterse cu null;
+        # doar deliveryDate si info accepta null
+        if value is None:
+            raise ValueError("may be omitted but not set to null")
+        return value
+
+
+class OrderUpdateItem(BaseModel):
+    id: str
+    changes: OrderPatch
+
+
+class BulkOrdersIn(BaseModel):
+    create: List[OrderIn] = []
+    update: List[OrderUpdateItem] = []
+    delete: List[str] = []
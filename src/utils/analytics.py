@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+# groupBy -> formatul $dateToString pentru grupari pe timp (UTC)
+_DATE_FORMATS = {
+    "day": "%Y-%m-%d",
+    "week": "%G-W%V",
+    "month": "%Y-%m",
+}
+# groupBy -> camp pentru grupari pe categorie
+_FIELD_GROUPS = {
+    "status": "$status",
+    "paymentMethod": "$paymentMethod",
+}
+GROUP_BY = tuple(_DATE_FORMATS) + tuple(_FIELD_GROUPS) + ("category",)
+
+
+def _floor(value, unit):
+    value = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if unit == "week":
+        return value - timedelta(days=value.weekday())
+    if unit == "month":
+        return value.replace(day=1)
+    return value
+
+
+def _next(value, unit):
+    if unit == "week":
+        return value + timedelta(weeks=1)
+    if unit == "month":
+        return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return value + timedelta(days=1)
+
+
+def align_range(start, end, group_by):
+    """Widen ``[start, end)`` to whole buckets (days, or weeks/months for those groupings).
+
+    Requests for "the last 30 days" made a few seconds apart then map to the
+    same range, so they share a cache entry and never split a bucket.
+    """
+    unit = group_by if group_by in ("week", "month") else "day"
+    if start is not None:
+        start = _floor(start, unit)
+    if end is not None:
+        floor = _floor(end, unit)
+        end = floor if floor == end else _next(floor, unit)
+    return start, end
+
+
+def build_revenue_pipeline(group_by, match):
+    """Aggregation pipeline for order/revenue totals grouped by ``group_by``.
+
+    ``category`` unwinds the products and sums ``price * quantity`` per
+    ``title_category``; every other grouping sums ``totalPrice`` per order.
+    Orders without a BSON date ``orderDate`` are left out of day/week/month,
+    and product lines with a non-numeric price or quantity out of category.
+    Raises ValueError for an unknown grouping.
+    """
+    if group_by not in GROUP_BY:
+        raise ValueError(f"groupBy must be one of: {', '.join(GROUP_BY)}")
+    if group_by in _DATE_FORMATS:
+        # $dateToString esueaza pe un orderDate stocat ca string; acestea nu intra in nicio zi
+        date_only = {"orderDate": {"$type": "date"}}
+        match = {"$and": [match, date_only]} if match else date_only
+    pipeline = [{"$match": match}] if match else []
+    if group_by == "category":
+        pipeline += [
+            {"$project": {"products": 1}},
+            {"$unwind": "$products"},
+            # $multiply esueaza pe pret/cantitate non-numerice; liniile respective sunt ignorate
+            {"$match": {"products.price": {"$type": "number"}, "products.quantity": {"$type": "number"}}},
+            {"$group": {
+                "_id": "$products.title_category",
+                # numarul de comenzi distincte ar cere un $addToSet nemarginit
+                "lines": {"$sum": 1},
+                "units": {"$sum": "$products.quantity"},
+                "revenue": {"$sum": {"$multiply": ["$products.price", "$products.quantity"]}},
+            }},
+        ]
+    else:
+        if group_by in _DATE_FORMATS:
+            key = {"$dateToString": {"format": _DATE_FORMATS[group_by], "date": "$orderDate"}}
+        else:
+            key = _FIELD_GROUPS[group_by]
+        pipeline.append({"$group": {
+            "_id": key,
+            "orders": {"$sum": 1},
+            "revenue": {"$sum": "$totalPrice"},
+        }})
+    pipeline.append({"$sort": {"_id": 1}})
+    return pipeline
+
+
+def format_buckets(docs):
+    buckets = []
+    for doc in docs:
+        bucket = {"key": doc.pop("_id")}
+        bucket.update(doc)
+        bucket["revenue"] = round(doc.get("revenue") or 0, 2)
+        if "orders" in doc:
+            bucket["averageOrder"] = round(bucket["revenue"] / doc["orders"], 2) if doc["orders"] else 0
+        buckets.append(bucket)
+    return buckets
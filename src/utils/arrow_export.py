@@ -0,0 +1,200 @@
+import json
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.utils.normalize import _fast_products
+from src.utils.streaming import ChunkSink
+
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# loturile mici de la cursor sunt adunate in row group-uri de marime rezonabila
+PARQUET_ROW_GROUP_SIZE = 64 * 1024
+
+_CATEGORY = pa.dictionary(pa.int8(), pa.string())
+PRODUCT_ARROW_TYPE = pa.struct([
+    ("id", pa.string()),
+    ("title", pa.string()),
+    ("price", pa.float64()),
+    ("title_category", pa.string()),
+    ("quantity", pa.int64()),
+])
+
+# tipul Arrow al fiecarei coloane de export (BSON date = milisecunde, UTC)
+ORDER_ARROW_TYPES = {
+    "id": pa.string(),
+    "userId": pa.string(),
+    "orderNumber": pa.int64(),
+    "clientName": pa.string(),
+    "clientEmail": pa.string(),
+    "clientPhone": pa.string(),
+    "clientAddress": pa.string(),
+    "orderDate": pa.timestamp("ms", tz="UTC"),
+    "deliveryDate": pa.timestamp("ms", tz="UTC"),
+    "info": pa.string(),
+    "status": _CATEGORY,
+    "totalPrice": pa.float64(),
+    "paymentMethod": _CATEGORY,
+    "products": pa.list_(PRODUCT_ARROW_TYPE),
+}
+
+
+def _text(value):
+    if value is None or value == "":
+        return None
+    return value if type(value) is str else str(value)
+
+
+def _timestamp(value):
+    # documente din Mongo: datetime; randuri din snapshot: text ISO
+    if isinstance(value, datetime):
+        return value
+    if type(value) is str and value:
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _number(py_type):
+    def convert(value):
+        if type(value) is py_type:
+            return value
+        if type(value) in (int, float) or (type(value) is str and value):
+            try:
+                return py_type(value)
+            except ValueError:
+                return None
+        return None
+    return convert
+
+
+def _products(value):
+    if type(value) is str:
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    return _fast_products(value)
+
+
+_CONVERTERS = {
+    "orderNumber": _number(int),
+    "orderDate": _timestamp,
+    "deliveryDate": _timestamp,
+    "totalPrice": _number(float),
+    "products": _products,
+}
+
+
+def order_schema(columns):
+    return pa.schema([(c, ORDER_ARROW_TYPES[c]) for c in columns])
+
+
+def docs_to_record_batch(docs, schema):
+    """Build a typed record batch column by column from raw order documents.
+
+    Values that do not fit the column type (malformed documents) become nulls
+    instead of failing the whole export.
+    """
+    arrays = []
+    for field in schema:
+        name = field.name
+        if name == "id":
+            values = [_text(doc.get("id", doc.get("_id"))) for doc in docs]
+        else:
+            convert = _CONVERTERS.get(name, _text)
+            values = [convert(doc.get(name)) for doc in docs]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ArrowSink(ChunkSink):
+    # pyarrow tine evidenta pozitiei prin tell() (footer-ul Parquet are offset-uri)
+    closed = False
+
+    def __init__(self):
+        super().__init__()
+        self._position = 0
+
+    def write(self, data):
+        self._position += len(data)
+        return super().write(data)
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        self.closed = True
+
+
+class ArrowEncoder:
+    """Encode batches of order documents as an Arrow IPC stream.
+
+    Every batch becomes one record batch written straight to the response,
+    so memory stays bounded by the export batch size.
+    """
+
+    # primeste documentele brute, nu randurile din normalize_orders
+    raw_docs = True
+
+    def __init__(self, columns):
+        self.schema = order_schema(columns)
+        self._sink = _ArrowSink()
+        self._writer = None
+
+    def start(self):
+        self._writer = pa.ipc.new_stream(self._sink, self.schema)
+        return self._sink.drain()
+
+    def encode(self, docs):
+        self._writer.write_batch(docs_to_record_batch(docs, self.schema))
+        return self._sink.drain()
+
+    def finish(self):
+        self._writer.close()
+        return self._sink.drain()
+
+
+class ParquetEncoder:
+    """Encode batches of order documents as a Parquet file.
+
+    Record batches are buffered up to ``row_group_size`` rows and written as
+    one row group, so only the footer is held until the end.
+    """
+
+    raw_docs = True
+
+    def __init__(self, columns, row_group_size=PARQUET_ROW_GROUP_SIZE):
+        self.schema = order_schema(columns)
+        self.row_group_size = row_group_size
+        self._sink = _ArrowSink()
+        self._writer = None
+        self._pending = []
+        self._pending_rows = 0
+
+    def start(self):
+        self._writer = pq.ParquetWriter(pa.PythonFile(self._sink, mode="w"), self.schema, compression="zstd")
+        return self._sink.drain()
+
+    def _flush_row_group(self):
+        if self._pending:
+            self._writer.write_table(pa.Table.from_batches(self._pending, self.schema), row_group_size=self._pending_rows)
+            self._pending = []
+            self._pending_rows = 0
+
+    def encode(self, docs):
+        batch = docs_to_record_batch(docs, self.schema)
+        self._pending.append(batch)
+        self._pending_rows += batch.num_rows
+        if self._pending_rows >= self.row_group_size:
+            self._flush_row_group()
+        return self._sink.drain()
+
+    def finish(self):
+        self._flush_row_group()
+        self._writer.close()
+        return self._sink.drain()
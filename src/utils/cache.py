@@ -0,0 +1,53 @@
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Small in-process LRU map bounded by number of entries."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def set(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self._data.pop(key, default)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TTLCache(LRUCache):
+    """LRU map whose entries also expire ``ttl`` seconds after being set."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        super().__init__(maxsize)
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        entry = super().get(key)
+        if entry is None:
+            return default
+        expires, value = entry
+        if time.monotonic() >= expires:
+            self.pop(key)
+            return default
+        return value
+
+    def set(self, key, value):
+        super().set(key, (time.monotonic() + self.ttl, value))
@@ -0,0 +1,88 @@
+import time
+import zlib
+
+import zstandard
+
+from src.utils.metrics import EXPORT_COMPRESSION_IN, EXPORT_COMPRESSION_OUT, EXPORT_COMPRESSION_SECONDS
+
+# codec -> (media type pentru ?compress=, extensie adaugata la numele fisierului)
+COMPRESSION_CODECS = {
+    "gzip": ("application/gzip", ".gz"),
+    "zstd": ("application/zstd", ".zst"),
+}
+DEFAULT_LEVELS = {"gzip": 6, "zstd": 3}
+# la Accept-Encoding cu aceeasi prioritate, zstd e preferat (mai rapid la raport similar)
+PREFERRED_ORDER = ("zstd", "gzip")
+
+
+def negotiate_encoding(accept_encoding):
+    """Best supported codec in an ``Accept-Encoding`` header, or None."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    wildcard = weights.get("*", 0.0)
+    best = None
+    for codec in PREFERRED_ORDER:
+        q = weights.get(codec, wildcard)
+        if q > 0 and (best is None or q > best[0]):
+            best = (q, codec)
+    return best[1] if best else None
+
+
+def make_compressor(codec, level=None):
+    """Streaming compressor with ``compress(data)`` and ``flush()``."""
+    level = DEFAULT_LEVELS[codec] if level is None else level
+    if codec == "gzip":
+        # wbits=31: header si trailer gzip
+        return zlib.compressobj(level, zlib.DEFLATED, 31)
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=level).compressobj()
+    raise ValueError(f"compress must be one of: {', '.join(COMPRESSION_CODECS)}")
+
+
+class CompressedEncoder:
+    """Wraps a streaming encoder and compresses its output chunk by chunk.
+
+    Compression runs in the same executor step as the encoding of each batch,
+    so only the compressor's window is kept in memory.
+    """
+
+    def __init__(self, encoder, codec, level=None, trace=None):
+        self.encoder = encoder
+        self.codec = codec
+        self.raw_docs = getattr(encoder, "raw_docs", False)
+        self.trace = trace
+        self._compressor = make_compressor(codec, level)
+
+    def _compress(self, data, final=False):
+        t0 = time.perf_counter()
+        out = self._compressor.compress(data) if data else b""
+        if final:
+            out += self._compressor.flush()
+        seconds = time.perf_counter() - t0
+        if self.trace is not None:
+            self.trace.add("compress", seconds)
+        EXPORT_COMPRESSION_IN.inc(len(data), codec=self.codec)
+        EXPORT_COMPRESSION_OUT.inc(len(out), codec=self.codec)
+        EXPORT_COMPRESSION_SECONDS.inc(seconds, codec=self.codec)
+        return out
+
+    def start(self):
+        return self._compress(self.encoder.start())
+
+    def encode(self, rows):
+        return self._compress(self.encoder.encode(rows))
+
+    def finish(self):
+        return self._compress(self.encoder.finish(), final=True)
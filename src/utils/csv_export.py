@@ -0,0 +1,34 @@
+import csv
+from io import StringIO
+
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+# UTF-8 BOM, ca Excel sa recunoasca diacriticele (echivalent encoding="utf-8-sig")
+UTF8_BOM = b"\xef\xbb\xbf"
+
+
+class CsvEncoder:
+    """Encode batches of row dicts as CSV bytes, one batch at a time."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self._buffer = StringIO()
+        # lineterminator="\n" pastreaza formatul produs anterior de DataFrame.to_csv
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+
+    def _take(self):
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data.encode("utf-8")
+
+    def start(self):
+        self._writer.writerow(self.columns)
+        return UTF8_BOM + self._take()
+
+    def encode(self, rows):
+        columns = self.columns
+        self._writer.writerows([row.get(c, "") for c in columns] for row in rows)
+        return self._take()
+
+    def finish(self):
+        return b""
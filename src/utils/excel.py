@@ -1,14 +1,243 @@
-import pandas as pd
+import math
+import re
+import zipfile
 from io import BytesIO
+from xml.sax.saxutils import escape
 from fastapi.responses import StreamingResponse
+from src.utils.streaming import ChunkSink
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
 def generate_excel(orders):
+    import pandas as pd
+
     df = pd.DataFrame(orders)
     stream = BytesIO()
     df.to_excel(stream, index=False, engine='openpyxl')
     stream.seek(0)
     return StreamingResponse(
         stream,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        media_type=XLSX_MEDIA_TYPE,
         headers={"Content-Disposition": "attachment; filename=comenzi.xlsx"}
-    )
\ No newline at end of file
+    )
+
+
+# --- Streaming XLSX writer ---------------------------------------------------
+# Scrie direct partile OOXML intr-un zip ne-seekable, astfel incat fiecare lot de
+# randuri poate fi trimis clientului imediat ce a fost comprimat.
+
+# caractere de control interzise in XML 1.0 (openpyxl ridica IllegalCharacterError)
+_ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_ATTR_ENTITIES = {'"': "&quot;"}
+
+_CONTENT_TYPES_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+# stil 0 = implicit, stil 1 = header bold (ca la pandas.to_excel)
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetData>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def _column_letter(idx):
+    # 0 -> A, 25 -> Z, 26 -> AA
+    letters = ""
+    idx += 1
+    while idx:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _cell_xml(ref, value, style=0):
+    style_attr = f' s="{style}"' if style else ""
+    if value is None or value == "":
+        return ""
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"{style_attr}><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)) and not (isinstance(value, float) and not math.isfinite(value)):
+        return f'<c r="{ref}"{style_attr}><v>{value!r}</v></c>'
+    text = value if isinstance(value, str) else str(value)
+    text = escape(_ILLEGAL_XML_CHARS.sub("", text))
+    space = ' xml:space="preserve"' if text[:1].isspace() or text[-1:].isspace() else ""
+    return f'<c r="{ref}" t="inlineStr"{style_attr}><is><t{space}>{text}</t></is></c>'
+
+
+def _row_xml(letters, r, values, style=0):
+    cells = "".join(
+        _cell_xml(f"{letter}{r}", value, style)
+        for letter, value in zip(letters, values)
+    )
+    return f'<row r="{r}">{cells}</row>'
+
+
+class StreamingXlsxWriter:
+    """Incremental XLSX writer: rows are compressed as they arrive and the
+    produced bytes can be collected with ``drain()`` after every batch."""
+
+    def __init__(self, compresslevel=6):
+        self._sink = ChunkSink()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+        self._sheets = []
+        self._sheet = None
+        self._letters = []
+        self._row_idx = 0
+
+    def open_sheet(self, title, columns):
+        if self._sheet is not None:
+            self.close_sheet()
+        self._sheets.append(title)
+        part = f"xl/worksheets/sheet{len(self._sheets)}.xml"
+        # force_zip64: dimensiunea foii nu e cunoscuta dinainte
+        self._sheet = self._zip.open(part, "w", force_zip64=True)
+        self._letters = [_column_letter(i) for i in range(len(columns))]
+        self._row_idx = 0
+        self._sheet.write(_SHEET_HEAD.encode("utf-8"))
+        self._write_row(columns, style=1)
+
+    def _write_row(self, values, style=0):
+        self._row_idx += 1
+        self._sheet.write(_row_xml(self._letters, self._row_idx, values, style).encode("utf-8"))
+
+    def write_rows(self, rows):
+        for values in rows:
+            self._write_row(values)
+
+    def write_row_xml(self, data):
+        """Append ``<row>`` XML built elsewhere (see XlsxRowEncoder); row numbers are the caller's job."""
+        self._sheet.write(data)
+
+    def close_sheet(self):
+        self._sheet.write(_SHEET_TAIL.encode("utf-8"))
+        self._sheet.close()
+        self._sheet = None
+
+    def drain(self):
+        return self._sink.drain()
+
+    def close(self):
+        if self._sheet is not None:
+            self.close_sheet()
+        if not self._sheets:
+            self.open_sheet("Sheet1", [])
+            self.close_sheet()
+
+        sheet_entries = "".join(
+            f'<sheet name="{escape(title[:31], _ATTR_ENTITIES)}" sheetId="{i}" r:id="rId{i}"/>'
+            for i, title in enumerate(self._sheets, start=1)
+        )
+        workbook = (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets>{sheet_entries}</sheets></workbook>'
+        )
+        n = len(self._sheets)
+        rel_entries = "".join(
+            f'<Relationship Id="rId{i}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{i}.xml"/>'
+            for i in range(1, n + 1)
+        )
+        workbook_rels = (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{rel_entries}'
+            f'<Relationship Id="rId{n + 1}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+            'Target="styles.xml"/>'
+            '</Relationships>'
+        )
+        content_types = _CONTENT_TYPES_HEAD + "".join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in range(1, n + 1)
+        ) + '</Types>'
+
+        self._zip.writestr("xl/workbook.xml", workbook)
+        self._zip.writestr("xl/_rels/workbook.xml.rels", workbook_rels)
+        self._zip.writestr("xl/styles.xml", _STYLES)
+        self._zip.writestr("_rels/.rels", _ROOT_RELS)
+        self._zip.writestr("[Content_Types].xml", content_types)
+        self._zip.close()
+        return self._sink.drain()
+
+
+class XlsxEncoder:
+    """Single-sheet encoder with the same start/encode/finish interface as CsvEncoder."""
+
+    def __init__(self, columns, sheet_title="Sheet1"):
+        self.columns = list(columns)
+        self.sheet_title = sheet_title
+        self._writer = StreamingXlsxWriter()
+
+    def start(self):
+        self._writer.open_sheet(self.sheet_title, self.columns)
+        return self._writer.drain()
+
+    def encode(self, rows):
+        columns = self.columns
+        self._writer.write_rows([row.get(c, "") for c in columns] for row in rows)
+        return self._writer.drain()
+
+    def finish(self):
+        return self._writer.close()
+
+
+class XlsxRowEncoder:
+    """Encode row dicts as ``<row>`` XML fragments numbered from ``first_row``.
+
+    Used by the parallel export: each partition is rendered in a worker and
+    the fragments are written into the sheet in order.
+    """
+
+    def __init__(self, columns, first_row=2):
+        self.columns = list(columns)
+        self.next_row = first_row
+        self._letters = [_column_letter(i) for i in range(len(self.columns))]
+
+    def encode(self, rows):
+        columns = self.columns
+        letters = self._letters
+        parts = []
+        r = self.next_row
+        for row in rows:
+            parts.append(_row_xml(letters, r, [row.get(c, "") for c in columns]))
+            r += 1
+        self.next_row = r
+        return "".join(parts).encode("utf-8")
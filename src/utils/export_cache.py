@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from src.utils.metrics import EXPORT_CACHE
+
+# schimba versiunea cand se modifica formatul exporturilor, ca fisierele vechi sa nu mai fie servite
+EXPORT_CACHE_VERSION = "1"
+
+
+def export_key(fmt, params):
+    """Stable hash of an export request (format, filter, columns, layout, source)."""
+    payload = {"format": fmt, "_v": EXPORT_CACHE_VERSION, **params}
+    encoded = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def export_etag(key, state):
+    """ETag (without quotes) of an export: request key + dataset fingerprint."""
+    encoded = json.dumps({"key": key, "state": state}, sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def etag_matches(if_none_match, etag):
+    # If-None-Match: "a", W/"b" sau *
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"') == etag:
+            return True
+    return False
+
+
+class ExportCacheWriter:
+    """Temporary file an export is streamed into; ``commit()`` publishes it.
+
+    Disk errors only disable caching for this export, never the download.
+    """
+
+    def __init__(self, cache, key, etag, ext):
+        self.cache = cache
+        self.key = key
+        self.path = cache._path(key, etag, ext)
+        self.tmp = f"{self.path}.{uuid.uuid4().hex}.part"
+        self.size = 0
+        try:
+            os.makedirs(cache.directory, exist_ok=True)
+            self._file = open(self.tmp, "wb")
+        except OSError as e:
+            print("Export cache write failed:", e)
+            self._file = None
+
+    def write(self, chunk):
+        if self._file is None:
+            return
+        try:
+            self._file.write(chunk)
+        except OSError as e:
+            print("Export cache write failed:", e)
+            self.discard()
+            return
+        self.size += len(chunk)
+
+    def commit(self):
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+            os.replace(self.tmp, self.path)
+        except OSError as e:
+            print("Export cache write failed:", e)
+            self.discard()
+            return
+        self._file = None
+        self.cache._add(self.key, self.path, self.size)
+
+    def discard(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        try:
+            os.remove(self.tmp)
+        except OSError:
+            pass
+
+
+class ExportCache:
+    """Disk cache of rendered exports, keyed by ``(request key, etag)``.
+
+    Only the newest rendering of each request is kept; files are evicted
+    least recently used first once ``max_bytes`` is exceeded. ``max_bytes=0``
+    disables the cache.
+    """
+
+    def __init__(self, directory, max_bytes=1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._files = OrderedDict()
+        self._used = 0
+        self._loaded = False
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _load_index(self):
+        # la primul acces: fisierele ramase de la rularea anterioara raman valabile
+        self._loaded = True
+        if not os.path.isdir(self.directory):
+            return
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".part"):
+                # export intrerupt de o oprire brusca
+                os.remove(path)
+                continue
+            st = os.stat(path)
+            entries.append((st.st_mtime, path, st.st_size))
+        for _, path, size in sorted(entries):
+            self._files[path] = size
+            self._used += size
+
+    def _path(self, key, etag, ext):
+        return os.path.join(self.directory, f"{key}-{etag}{ext}")
+
+    def get(self, key, etag, ext):
+        """Path of the cached rendering, or None."""
+        path = self._path(key, etag, ext)
+        with self._lock:
+            if not self._loaded:
+                self._load_index()
+            hit = path in self._files and os.path.exists(path)
+            if hit:
+                self._files.move_to_end(path)
+            elif path in self._files:
+                self._used -= self._files.pop(path)
+        EXPORT_CACHE.inc(result="hit" if hit else "miss")
+        return path if hit else None
+
+    def writer(self, key, etag, ext):
+        return ExportCacheWriter(self, key, etag, ext)
+
+    def _add(self, key, path, size):
+        with self._lock:
+            if not self._loaded:
+                self._load_index()
+            # versiunile mai vechi ale aceluiasi export nu mai pot fi servite
+            prefix = os.path.join(self.directory, f"{key}-")
+            stale = [p for p in self._files if p.startswith(prefix) and p != path]
+            for p in stale:
+                self._drop(p)
+            self._used += size - self._files.pop(path, 0)
+            self._files[path] = size
+            while self._used > self.max_bytes and self._files:
+                self._drop(next(iter(self._files)))
+
+    def _drop(self, path):
+        self._used -= self._files.pop(path)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import time
+import uuid
+
+
+class ExportJob:
+    def __init__(self, job_id, key, filename, media_type, path):
+        self.id = job_id
+        self.key = key
+        self.filename = filename
+        self.media_type = media_type
+        self.path = path
+        self.status = "queued"
+        self.rows = 0
+        self.total = None
+        self.bytes = 0
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def add_rows(self, count):
+        self.rows += count
+
+    def to_dict(self):
+        progress = None
+        if self.status == "done":
+            progress = 1.0
+        elif self.total:
+            progress = round(min(self.rows / self.total, 1.0), 4)
+        return {
+            "id": self.id,
+            "status": self.status,
+            "rows": self.rows,
+            "total": self.total,
+            "progress": progress,
+            "bytes": self.bytes,
+            "error": self.error,
+        }
+
+
+class ExportJobManager:
+    """Runs exports in the background and keeps their results on disk.
+
+    At most ``workers`` jobs run at once; submitting the same export (same
+    ``key``) while it is queued or running returns the existing job. Finished
+    results are deleted ``ttl`` seconds after completion.
+    """
+
+    def __init__(self, directory, workers=2, ttl=3600):
+        self.directory = directory
+        self.ttl = ttl
+        self._workers = workers
+        self._semaphore = None
+        self._jobs = {}
+        self._in_flight = {}
+        self._tasks = set()
+
+    def get(self, job_id):
+        self.purge_expired()
+        return self._jobs.get(job_id)
+
+    def submit(self, key, filename, media_type, make_stream, count_total=None):
+        """Start (or join) an export job.
+
+        ``make_stream(on_rows)`` returns an async iterator of bytes and calls
+        ``on_rows(n)`` as batches are processed; ``count_total()`` is an
+        optional coroutine estimating the number of rows.
+        """
+        self.purge_expired()
+        job = self._in_flight.get(key)
+        if job is not None:
+            return job, False
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._workers)
+            self._purge_stale_files()
+        job_id = uuid.uuid4().hex
+        ext = os.path.splitext(filename)[1]
+        job = ExportJob(job_id, key, filename, media_type, os.path.join(self.directory, f"{job_id}{ext}"))
+        self._jobs[job_id] = job
+        self._in_flight[key] = job
+
+        task = asyncio.ensure_future(self._run(job, make_stream, count_total))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job, True
+
+    async def _run(self, job, make_stream, count_total):
+        loop = asyncio.get_running_loop()
+        try:
+            async with self._semaphore:
+                job.status = "running"
+                if count_total is not None:
+                    job.total = await count_total()
+                with open(job.path, "wb") as f:
+                    async for chunk in make_stream(job.add_rows):
+                        await loop.run_in_executor(None, f.write, chunk)
+                        job.bytes += len(chunk)
+                job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            if self._in_flight.get(job.key) is job:
+                del self._in_flight[job.key]
+            if job.status != "done" and os.path.exists(job.path):
+                os.remove(job.path)
+
+    def purge_expired(self):
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.ttl:
+                del self._jobs[job_id]
+                try:
+                    os.remove(job.path)
+                except OSError:
+                    pass
+
+    def _purge_stale_files(self):
+        # rezultate ramase de la o rulare anterioara a procesului
+        os.makedirs(self.directory, exist_ok=True)
+        now = time.time()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) > self.ttl:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    async def shutdown(self):
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,22 @@
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+
+def _default(value):
+    # orjson serializeaza nativ datetime/dict/list; ramane doar ce vine din BSON
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content):
+    """Serialize raw Mongo documents (ObjectId, datetime) straight to JSON bytes."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that skips FastAPI's jsonable_encoder pass over every document."""
+
+    def render(self, content):
+        return dumps(content)
@@ -0,0 +1,61 @@
+import asyncio
+import re
+import zipfile
+from collections import deque
+
+from src.utils.invoice_cache import INVOICE_FIELDS
+from src.utils.streaming import ChunkSink
+
+ZIP_MEDIA_TYPE = "application/zip"
+
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def invoice_payload(order_doc):
+    # doar campurile folosite pe factura trec granita dintre procese
+    return {f: order_doc.get(f) for f in INVOICE_FIELDS}
+
+
+def invoice_filename(order_doc):
+    safe_id = _UNSAFE_FILENAME_CHARS.sub("_", str(order_doc.get("id", ""))) or "order"
+    return f"invoice_{safe_id}.pdf"
+
+
+async def stream_invoice_zip(doc_batches, render, max_in_flight):
+    """Stream a ZIP archive of invoices.
+
+    ``doc_batches`` is an async iterator of prepared order documents (lists)
+    and ``render`` an async callable returning PDF bytes. At most
+    ``max_in_flight`` renders are pending at once, so memory does not grow
+    with the number of invoices; archive entries keep the cursor order.
+    """
+    sink = ChunkSink()
+    # PDF-urile ReportLab sunt deja comprimate, deci le stocam ca atare
+    archive = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED)
+    pending = deque()
+    used_names = set()
+
+    def add(order_doc, pdf):
+        name = invoice_filename(order_doc)
+        if name in used_names:
+            name = f"{name[:-4]}_{len(used_names)}.pdf"
+        used_names.add(name)
+        archive.writestr(name, pdf)
+        return sink.drain()
+
+    try:
+        async for docs in doc_batches:
+            for order_doc in docs:
+                if len(pending) >= max_in_flight:
+                    done_doc, task = pending.popleft()
+                    yield add(done_doc, await task)
+                pending.append((order_doc, asyncio.ensure_future(render(order_doc))))
+        while pending:
+            done_doc, task = pending.popleft()
+            yield add(done_doc, await task)
+        archive.close()
+        yield sink.drain()
+    finally:
+        # clientul s-a deconectat: nu mai randam facturile ramase
+        for _, task in pending:
+            task.cancel()
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dotenv import dotenv_values
+from src.utils.metrics import INVOICE_CACHE
+
+config = dotenv_values(".env")
+
+# schimba versiunea cand se modifica layout-ul facturii, ca PDF-urile vechi sa nu mai fie servite
+INVOICE_TEMPLATE_VERSION = "1"
+
+# campurile comenzii care apar efectiv pe factura
+INVOICE_FIELDS = (
+    "id", "orderNumber", "orderDate", "clientName", "clientEmail",
+    "clientPhone", "clientAddress", "products", "info", "paymentMethod",
+)
+
+
+def invoice_digest(order_doc):
+    """Content hash of the fields rendered on the invoice."""
+    payload = {f: order_doc.get(f) for f in INVOICE_FIELDS}
+    payload["_v"] = INVOICE_TEMPLATE_VERSION
+    encoded = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _order_dirname(order_id):
+    # order_id poate contine orice caractere; pe disc folosim un hash
+    return hashlib.sha1(str(order_id).encode("utf-8")).hexdigest()
+
+
+class InvoiceCache:
+    """Two-tier cache of rendered invoice PDFs.
+
+    Entries are keyed by ``(order_id, digest)``. The memory tier is an LRU
+    bounded by ``memory_bytes``; the disk tier lives under ``disk_dir`` and
+    evicts least recently used files once ``disk_bytes`` is exceeded.
+    """
+
+    def __init__(self, memory_bytes=32 * 1024 * 1024, disk_dir=None, disk_bytes=512 * 1024 * 1024):
+        self.memory_bytes = memory_bytes
+        self.disk_dir = disk_dir
+        self.disk_bytes = disk_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._disk = OrderedDict()
+        self._disk_used = 0
+        if disk_dir:
+            self._load_disk_index()
+
+    def _load_disk_index(self):
+        os.makedirs(self.disk_dir, exist_ok=True)
+        entries = []
+        for dirpath, _, filenames in os.walk(self.disk_dir):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if not name.endswith(".pdf"):
+                    # fisiere temporare ramase dupa o oprire brusca
+                    os.remove(path)
+                    continue
+                st = os.stat(path)
+                entries.append((st.st_mtime, path, st.st_size))
+        for _, path, size in sorted(entries):
+            self._disk[path] = size
+            self._disk_used += size
+
+    def _path(self, order_id, digest):
+        return os.path.join(self.disk_dir, _order_dirname(order_id), f"{digest}.pdf")
+
+    def _remember(self, key, pdf):
+        if len(pdf) > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_used -= len(old)
+        self._memory[key] = pdf
+        self._memory_used += len(pdf)
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    def get(self, order_id, digest):
+        key = (str(order_id), digest)
+        with self._lock:
+            pdf = self._memory.get(key)
+            if pdf is not None:
+                self._memory.move_to_end(key)
+                INVOICE_CACHE.inc(result="memory")
+                return pdf
+            pdf = self._read_disk(key)
+        INVOICE_CACHE.inc(result="disk" if pdf is not None else "miss")
+        return pdf
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._path(*key)
+        if path not in self._disk:
+            return None
+        try:
+            with open(path, "rb") as f:
+                pdf = f.read()
+        except OSError:
+            self._disk_used -= self._disk.pop(path)
+            return None
+        self._disk.move_to_end(path)
+        self._remember(key, pdf)
+        return pdf
+
+    def put(self, order_id, digest, pdf):
+        key = (str(order_id), digest)
+        with self._lock:
+            self._remember(key, pdf)
+            if not self.disk_dir:
+                return
+            path = self._path(*key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(pdf)
+                os.replace(tmp, path)
+            except OSError as e:
+                print("Invoice cache write failed:", e)
+                return
+            self._disk_used += len(pdf) - self._disk.pop(path, 0)
+            self._disk[path] = len(pdf)
+            while self._disk_used > self.disk_bytes and self._disk:
+                evicted, size = self._disk.popitem(last=False)
+                self._disk_used -= size
+                try:
+                    os.remove(evicted)
+                except OSError:
+                    pass
+
+    def invalidate(self, order_id):
+        """Drop every cached rendering of ``order_id`` (all digests)."""
+        order_id = str(order_id)
+        with self._lock:
+            for key in [k for k in self._memory if k[0] == order_id]:
+                self._memory_used -= len(self._memory.pop(key))
+            if not self.disk_dir:
+                return
+            order_dir = os.path.join(self.disk_dir, _order_dirname(order_id))
+            for path in [p for p in self._disk if os.path.dirname(p) == order_dir]:
+                self._disk_used -= self._disk.pop(path)
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+invoice_cache = InvoiceCache(
+    memory_bytes=int(config.get("INVOICE_CACHE_MEMORY_BYTES") or 32 * 1024 * 1024),
+    disk_dir=config.get("INVOICE_CACHE_DIR") or os.path.join(".cache", "invoices"),
+    disk_bytes=int(config.get("INVOICE_CACHE_DISK_BYTES") or 512 * 1024 * 1024),
+)
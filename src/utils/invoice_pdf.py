@@ -0,0 +1,172 @@
+import copy
+import time
+from datetime import datetime
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+# Company block (header)
+COMPANY_NAME = "BUCHETUL SIMONEI POEZIA FLORILOR SRL"
+COMPANY_ADDR = "jud. Neamt, sat Tamaseni, Str. Unirii 224, Cod 617465"
+COMPANY_REG = "Înregistrare la Registrul Comertului: J27/802/2016, CUI: 36497181"
+COMPANY_CONTACT = "Contact: laurasimona97@yahoo.com — Tel: 0769141250"
+SITE_INFO = "www.buchetul-simonei.com"
+
+LEGAL_TEXT = (
+    "Site-ul www.buchetul-simonei.com este detinut si operat de BUCHETUL SIMONEI POEZIA FLORILOR SRL, "
+    "cu sediul în judetul Neamt, sat Tamaseni, Str. Unirii 224, Cod 617465. "
+    "Înregistrare la Registrul Comertului: J27/802/2016, CUI: 36497181."
+)
+
+VAT_RATE = 0.21
+PRODUCT_HEADER = ["#", "Produs", "Cant.", "Pret unitar", "Subtotal"]
+COL_WIDTHS = [10*mm, 95*mm, 20*mm, 30*mm, 30*mm]
+
+# comanda folosita doar la warm-up (incarca fonturile si cache-urile ReportLab)
+_WARM_UP_ORDER = {
+    "id": "warm-up",
+    "orderNumber": 0,
+    "orderDate": datetime(2024, 1, 1).isoformat(),
+    "clientName": "Warm up",
+    "clientEmail": "",
+    "clientPhone": "",
+    "clientAddress": "",
+    "info": "",
+    "paymentMethod": "card",
+    "products": [{"title": "Buchet", "quantity": 1, "price": 1.0}],
+}
+
+
+class InvoiceRenderer:
+    """Invoice PDF renderer.
+
+    Styles, the table style and the static company header / legal footer are
+    built once; ``render`` only assembles the per-order flowables.
+    """
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+        self.title_style = styles["Title"]
+        self.normal = styles["Normal"]
+        self.small = ParagraphStyle("small", parent=styles["Normal"], fontSize=8, leading=10)
+        self.heading = ParagraphStyle("heading", parent=styles["Heading2"], spaceAfter=6)
+        company_style = ParagraphStyle("cname", parent=styles["Heading1"], fontSize=14)
+        footer_heading = ParagraphStyle("foot_h", parent=styles["Heading4"], fontSize=9)
+        center = ParagraphStyle("center", parent=self.normal, alignment=1)
+
+        self.table_style = TableStyle([
+            ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#eeeeee")),
+            ("TEXTCOLOR", (0,0), (-1,0), colors.black),
+            ("ALIGN", (2,1), (-1,-1), "RIGHT"),
+            ("GRID", (0,0), (-1,-1), 0.4, colors.grey),
+            ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+            ("BACKGROUND", (0,-3), (-1,-1), colors.HexColor("#fafafa")),
+        ])
+
+        small = self.small
+        self._header = [
+            Paragraph(COMPANY_NAME, company_style),
+            Paragraph(COMPANY_ADDR, small),
+            Paragraph(COMPANY_REG, small),
+            Paragraph(COMPANY_CONTACT, small),
+            Paragraph(SITE_INFO, small),
+            Spacer(1, 8),
+            # Invoice title
+            Paragraph("FACTURA", self.title_style),
+            Spacer(1, 6),
+        ]
+        # Legal / contact footer block
+        self._footer = [
+            Paragraph(LEGAL_TEXT, small),
+            Spacer(1, 4),
+            Paragraph("Date de contact operator:", footer_heading),
+            Paragraph("BUCHETUL SIMONEI POEZIA FLORILOR SRL", small),
+            Paragraph(COMPANY_ADDR, small),
+            Paragraph(f"Email: {COMPANY_CONTACT.split('—')[0].strip()}", small),
+            Paragraph(f"Telefon: {COMPANY_CONTACT.split('—')[-1].strip()}", small),
+            Spacer(1, 6),
+            # Thank you footer
+            Paragraph("Multumim pentru comanda!", center),
+        ]
+
+    def warm_up(self):
+        """Render a throw-away invoice; returns the time it took in seconds."""
+        start = time.perf_counter()
+        self.render(_WARM_UP_ORDER)
+        return time.perf_counter() - start
+
+    def _products_table(self, products):
+        table_data = [PRODUCT_HEADER]
+        total = 0.0
+        for i, p in enumerate(products, start=1):
+            title = p.get("title") if isinstance(p, dict) else getattr(p, "title", str(p))
+            qty = p.get("quantity", 0) if isinstance(p, dict) else getattr(p, "quantity", 0)
+            price = p.get("price", 0.0) if isinstance(p, dict) else getattr(p, "price", 0.0)
+            try:
+                subtotal = float(price) * int(qty)
+            except Exception:
+                subtotal = 0.0
+            total += subtotal
+            table_data.append([str(i), title, str(qty), f"{price:.2f}", f"{subtotal:.2f}"])
+
+        # VAT and totals
+        vat_amount = total * VAT_RATE
+        total_with_vat = total
+
+        table_data.append(["", "", "", "Subtotal", f"{total:.2f}"])
+        table_data.append(["", "", "", f"TVA {int(VAT_RATE*100)}%", f"{vat_amount:.2f}"])
+        table_data.append(["", "", "", "Total (cu TVA)", f"{total_with_vat:.2f}"])
+
+        table = Table(table_data, colWidths=COL_WIDTHS, hAlign="LEFT")
+        table.setStyle(self.table_style)
+        return table
+
+    def render(self, order_doc):
+        """Return the invoice PDF bytes for a prepared order document."""
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4, leftMargin=15*mm, rightMargin=15*mm, topMargin=15*mm, bottomMargin=15*mm)
+        normal = self.normal
+
+        # flowable-urile statice sunt copiate: wrap() le modifica starea, iar
+        # randarile pot rula in paralel in executor
+        story = [copy.copy(f) for f in self._header]
+
+        # Invoice meta
+        story.append(Paragraph(f"Numar comanda: <b>{order_doc.get('orderNumber','')}</b>", normal))
+        story.append(Paragraph(f"ID comanda: {order_doc.get('id','')}", normal))
+        story.append(Paragraph(f"Data comanda: {order_doc.get('orderDate','')}", normal))
+        story.append(Spacer(1, 8))
+
+        # Client info
+        story.append(Paragraph("<b>Date client</b>", self.heading))
+        story.append(Paragraph(f"Nume: {order_doc.get('clientName','')}", normal))
+        story.append(Paragraph(f"Email: {order_doc.get('clientEmail','')}", normal))
+        story.append(Paragraph(f"Telefon: {order_doc.get('clientPhone','')}", normal))
+        story.append(Paragraph(f"Adresa: {order_doc.get('clientAddress','')}", normal))
+        story.append(Spacer(1, 8))
+
+        # Products table
+        story.append(self._products_table(order_doc.get("products", []) or []))
+        story.append(Spacer(1, 10))
+
+        # Additional info and payment method
+        story.append(Paragraph(f"Informatii comanda: {order_doc.get('info','')}", normal))
+        story.append(Paragraph(f"Metoda plata: {order_doc.get('paymentMethod','')}", normal))
+        story.append(Spacer(1, 8))
+
+        story.extend(copy.copy(f) for f in self._footer)
+
+        doc.build(story)
+        return buffer.getvalue()
+
+
+invoice_renderer = InvoiceRenderer()
+
+
+def render_invoice(order_doc):
+    # functie top-level (picklable): punctul de intrare pentru procesele din pool
+    return invoice_renderer.render(order_doc)
@@ -0,0 +1,72 @@
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.utils.arrow_export import PRODUCT_ARROW_TYPE
+from src.utils.normalize import ORDER_COLUMNS, normalize_orders, order_products
+
+# coloanele comenzii (fara lista de produse) + campurile produsului
+PARENT_COLUMNS = [c for c in ORDER_COLUMNS if c != "products"]
+PRODUCT_COLUMNS = {
+    # coloana exportata -> camp din OrderProductProps
+    "productId": "id",
+    "productTitle": "title",
+    "productCategory": "title_category",
+    "price": "price",
+    "quantity": "quantity",
+}
+LINE_ITEM_COLUMNS = PARENT_COLUMNS + list(PRODUCT_COLUMNS) + ["subtotal"]
+
+
+def parse_line_item_columns(columns):
+    """Like ``parse_columns``, for the line-item layout (LINE_ITEM_COLUMNS)."""
+    if not columns:
+        return list(LINE_ITEM_COLUMNS)
+    requested = {c.strip() for c in columns.split(",") if c.strip()}
+    unknown = requested.difference(LINE_ITEM_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+    if not requested:
+        return list(LINE_ITEM_COLUMNS)
+    return [c for c in LINE_ITEM_COLUMNS if c in requested]
+
+
+def line_item_projection(columns):
+    """Mongo projection for a line-item export: selected order fields + products."""
+    projection = {c: 1 for c in columns if c in PARENT_COLUMNS}
+    projection["products"] = 1
+    projection["_id"] = 1 if "id" in projection else 0
+    return projection
+
+
+def line_item_rows(docs, columns=None):
+    """Explode a batch of raw orders into one row per product.
+
+    The product lists of the whole batch are flattened in a single Arrow
+    array, and ``subtotal = price * quantity`` is computed column-wise.
+    """
+    columns = list(columns or LINE_ITEM_COLUMNS)
+    parent_columns = [c for c in columns if c in PARENT_COLUMNS]
+    parents = normalize_orders(docs, parent_columns) if parent_columns else None
+
+    items = pa.array([order_products(doc.get("products")) for doc in docs], type=pa.list_(PRODUCT_ARROW_TYPE))
+    parent_index = pc.list_parent_indices(items).to_pylist()
+    flat = pc.list_flatten(items)
+    product_columns = {}
+    for column, field in PRODUCT_COLUMNS.items():
+        if column in columns:
+            product_columns[column] = pc.struct_field(flat, field)
+    if "subtotal" in columns:
+        product_columns["subtotal"] = pc.round(
+            pc.multiply(pc.struct_field(flat, "price"), pc.cast(pc.struct_field(flat, "quantity"), pa.float64())), 2
+        )
+    products = pa.table(product_columns).to_pylist() if product_columns else [{} for _ in parent_index]
+
+    if parents is None:
+        return products
+    rows = []
+    append = rows.append
+    for i, product in zip(parent_index, products):
+        row = dict(parents[i])
+        row.update(product)
+        append(row)
+    return rows
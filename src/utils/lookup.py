@@ -0,0 +1,45 @@
+from bson import ObjectId
+
+# cate documente candidate aducem din $or (de obicei 1; mai multe doar la chei ambigue)
+MAX_CANDIDATES = 16
+
+
+def order_key_clauses(order_id):
+    """All valid interpretations of an order key, in lookup priority order:
+    custom ``id``, ``_id`` as string, ``_id`` as ObjectId, ``orderNumber``."""
+    # 1) câmp custom "id"  2) _id ca string (uneori _id este stocat ca string)
+    clauses = [{"id": order_id}, {"_id": order_id}]
+    # 3) _id ca ObjectId (daca order_id e un ObjectId valid)
+    if ObjectId.is_valid(order_id):
+        clauses.append({"_id": ObjectId(order_id)})
+    # 4) orderNumber (daca ai trimis numarul comenzii în URL)
+    try:
+        clauses.append({"orderNumber": int(order_id)})
+    except ValueError:
+        pass
+    return clauses
+
+
+def pick_order(docs, clauses):
+    """Return the document matching the highest-priority clause (or None)."""
+    best, best_rank = None, len(clauses)
+    for doc in docs:
+        for rank, clause in enumerate(clauses[:best_rank]):
+            (field, value), = clause.items()
+            if field in doc and doc[field] == value:
+                best, best_rank = doc, rank
+                break
+    # Mongo compara si tipuri numerice diferite (ex. 12 vs 12.0); daca nimic nu
+    # se potriveste exact in Python, pastram primul document gasit
+    if best is None and docs:
+        return docs[0]
+    return best
+
+
+def describe_clauses(clauses):
+    # forma JSON-serializabila a interogarilor, pentru raspunsul 404
+    return [
+        {field: f"ObjectId('{value}')" if isinstance(value, ObjectId) else value}
+        for clause in clauses
+        for field, value in clause.items()
+    ]
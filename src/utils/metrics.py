@@ -0,0 +1,183 @@
+import bisect
+import threading
+import time
+
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# secunde; acopera de la o factura din cache pana la exporturi de minute
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_REGISTRY = []
+
+
+def _label_text(names, values, extra=""):
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with optional labels (Prometheus text format)."""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def inc(self, value=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(n, "") for n in self.labelnames), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_label_text(self.labelnames, key)} {value}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # cheie -> [numarari per bucket (ultimul = +Inf), suma]
+        self._values = {}
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_label_text(self.labelnames, key)} {total}"
+            yield f"{self.name}_count{_label_text(self.labelnames, key)} {cumulative}"
+
+
+def render_metrics():
+    """Every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+EXPORT_DURATION = Histogram(
+    "florarie_export_duration_seconds", "Wall time of a whole export", ("format", "source"))
+EXPORT_STAGE = Histogram(
+    "florarie_export_stage_seconds", "Time spent per export stage (summed over batches)", ("format", "stage"))
+EXPORT_ROWS = Counter("florarie_export_rows_total", "Orders processed by exports", ("format",))
+EXPORT_BYTES = Counter("florarie_export_bytes_total", "Bytes emitted by exports", ("format",))
+NORMALIZE_FALLBACKS = Counter(
+    "florarie_normalize_fallback_total",
+    "Documents that left the normalization fast path (validated by pydantic, or invalid and exported raw)",
+    ("outcome",))
+INVOICE_CACHE = Counter(
+    "florarie_invoice_cache_requests_total", "Invoice PDF cache lookups by result", ("result",))
+# debit si raport per codec: in / seconds, out / in
+EXPORT_COMPRESSION_IN = Counter(
+    "florarie_export_compression_input_bytes_total", "Uncompressed export bytes fed to each codec", ("codec",))
+EXPORT_COMPRESSION_OUT = Counter(
+    "florarie_export_compression_output_bytes_total", "Compressed export bytes produced by each codec", ("codec",))
+EXPORT_COMPRESSION_SECONDS = Counter(
+    "florarie_export_compression_seconds_total", "CPU time spent compressing exports, per codec", ("codec",))
+EXPORT_CACHE = Counter(
+    "florarie_export_cache_requests_total",
+    "Export requests by cache result (not_modified = 304, hit = served from the rendered file)",
+    ("result",))
+INVOICE_STAGE = Histogram("florarie_invoice_stage_seconds", "Time spent per invoice request stage", ("stage",))
+
+
+def server_timing(stages):
+    """``Server-Timing`` header value from a {stage: seconds} mapping."""
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in stages.items())
+
+
+class ExportTrace:
+    """Per-export accumulator of stage timings, rows and bytes.
+
+    ``stage()`` calls are cheap (a perf_counter pair and a dict update), so
+    tracing stays on for every export; histograms are updated once, in
+    ``finish()``.
+    """
+
+    def __init__(self, format, source="live", on_rows=None):
+        self.format = format
+        self.source = source
+        self.on_rows = on_rows
+        self.stages = {}
+        self.rows = 0
+        self.bytes = 0
+        self._started = time.perf_counter()
+        self._finished = False
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_rows(self, count):
+        self.rows += count
+        if self.on_rows is not None:
+            self.on_rows(count)
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def timing_header(self):
+        stages = dict(self.stages)
+        stages["total"] = time.perf_counter() - self._started
+        return server_timing(stages)
+
+    def finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        EXPORT_DURATION.observe(time.perf_counter() - self._started, format=self.format, source=self.source)
+        for name, seconds in self.stages.items():
+            EXPORT_STAGE.observe(seconds, format=self.format, stage=name)
+        EXPORT_ROWS.inc(self.rows, format=self.format)
+        EXPORT_BYTES.inc(self.bytes, format=self.format)
+
+
+class _Stage:
+    __slots__ = ("_trace", "_name", "_t0")
+
+    def __init__(self, trace, name):
+        self._trace = trace
+        self._name = name
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self._trace.add(self._name, time.perf_counter() - self._t0)
@@ -0,0 +1,243 @@
+import json
+from datetime import datetime
+from src.schemas.order import OrderProps, OrderProductProps
+from src.utils.metrics import NORMALIZE_FALLBACKS
+
+# Ordinea coloanelor conform OrderProps
+ORDER_COLUMNS = [
+    "id",
+    "userId",
+    "orderNumber",
+    "clientName",
+    "clientEmail",
+    "clientPhone",
+    "clientAddress",
+    "orderDate",
+    "deliveryDate",
+    "info",
+    "status",
+    "totalPrice",
+    "paymentMethod",
+    "products"
+]
+
+_STR_FIELDS = ("id", "userId", "clientName", "clientEmail", "clientPhone", "clientAddress")
+_PRODUCT_FIELDS = ("id", "title", "price", "title_category", "quantity")
+_STATUSES = frozenset(["Pending", "Processing", "Delivered", "Cancelled"])
+_PAYMENT_METHODS = frozenset(["ramburs", "card"])
+
+# un singur encoder refolosit (json.dumps cu ensure_ascii=False construieste unul nou la fiecare apel)
+_encode_json = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _map_id(doc):
+    # normalizeaza _id -> id
+    if "_id" in doc and "id" not in doc:
+        try:
+            doc["id"] = str(doc["_id"])
+        except Exception:
+            doc["id"] = doc["_id"]
+
+
+def prepare_order_doc(doc):
+    """Map ``_id`` -> ``id`` and convert the date fields to ISO strings, in place."""
+    _map_id(doc)
+    # Convert datetimes to ISO strings (pydantic/Excel friendly)
+    if "orderDate" in doc and isinstance(doc["orderDate"], datetime):
+        doc["orderDate"] = doc["orderDate"].isoformat()
+    if "deliveryDate" in doc and isinstance(doc["deliveryDate"], datetime):
+        doc["deliveryDate"] = doc["deliveryDate"].isoformat()
+    return doc
+
+
+def _fast_products(products):
+    # lista de produse in forma exacta OrderProductProps -> dict-uri in ordinea campurilor
+    # (ce ar produce p.dict()), sau None daca trebuie validare completa
+    if type(products) is not list:
+        return None
+    out = []
+    for p in products:
+        if type(p) is not dict:
+            return None
+        try:
+            pid, title, price, category, qty = (p[f] for f in _PRODUCT_FIELDS)
+        except KeyError:
+            return None
+        if (type(pid) is not str or type(title) is not str or type(category) is not str
+                or type(qty) is not int or type(price) not in (float, int)):
+            return None
+        out.append({"id": pid, "title": title, "price": float(price), "title_category": category, "quantity": qty})
+    return out
+
+
+def order_products(value):
+    """Products of one order as OrderProductProps dicts; invalid items are skipped."""
+    products = _fast_products(value)
+    if products is not None:
+        return products
+    if type(value) is not list:
+        return []
+    out = []
+    for p in value:
+        try:
+            out.append(OrderProductProps.parse_obj(p).dict())
+        except Exception:
+            pass
+    return out
+
+
+def _fast_row(doc):
+    # Fast path: documentul are deja forma din OrderProps, deci construirea modelului
+    # pydantic nu ar schimba nimic; intoarce None daca e nevoie de validare completa.
+    for field in _STR_FIELDS:
+        if type(doc.get(field)) is not str:
+            return None
+    order_date = doc.get("orderDate")
+    delivery_date = doc.get("deliveryDate")
+    info = doc.get("info")
+    order_number = doc.get("orderNumber")
+    total_price = doc.get("totalPrice")
+    status = doc.get("status")
+    payment_method = doc.get("paymentMethod")
+    if (type(order_date) is not datetime
+            or (delivery_date is not None and type(delivery_date) is not datetime)
+            or (info is not None and type(info) is not str)
+            or type(order_number) is not int
+            or type(total_price) not in (float, int)
+            # type() inainte de lookup: o lista/dict stocata aici nu e hashable
+            or type(status) is not str or status not in _STATUSES
+            or type(payment_method) is not str or payment_method not in _PAYMENT_METHODS):
+        return None
+    products = _fast_products(doc.get("products"))
+    if products is None:
+        return None
+
+    return {
+        "id": doc["id"],
+        "userId": doc["userId"],
+        "orderNumber": order_number,
+        "clientName": doc["clientName"],
+        "clientEmail": doc["clientEmail"],
+        "clientPhone": doc["clientPhone"],
+        "clientAddress": doc["clientAddress"],
+        "orderDate": order_date.isoformat(),
+        "deliveryDate": delivery_date.isoformat() if delivery_date is not None else "",
+        "info": info or "",
+        "status": status,
+        "totalPrice": float(total_price),
+        "paymentMethod": payment_method,
+        "products": _encode_json(products)
+    }
+
+
+def _validated_row(doc):
+    prepare_order_doc(doc)
+
+    # Try to validate/normalize with OrderProps; if fails, fall back to raw mapping
+    try:
+        order = OrderProps.parse_obj(doc)
+    except Exception:
+        NORMALIZE_FALLBACKS.inc(outcome="invalid")
+        # fallback: use doc fields and stringify products
+        products = doc.get("products", [])
+        try:
+            products_json = _encode_json(products)
+        except Exception:
+            products_json = str(products)
+        return {
+            "id": doc.get("id", ""),
+            "userId": doc.get("userId", ""),
+            "orderNumber": doc.get("orderNumber", ""),
+            "clientName": doc.get("clientName", ""),
+            "clientEmail": doc.get("clientEmail", ""),
+            "clientPhone": doc.get("clientPhone", ""),
+            "clientAddress": doc.get("clientAddress", ""),
+            "orderDate": doc.get("orderDate", ""),
+            "deliveryDate": doc.get("deliveryDate", ""),
+            "info": doc.get("info", ""),
+            "status": doc.get("status", ""),
+            "totalPrice": doc.get("totalPrice", ""),
+            "paymentMethod": doc.get("paymentMethod", ""),
+            "products": products_json
+        }
+
+    NORMALIZE_FALLBACKS.inc(outcome="validated")
+    return {
+        "id": order.id,
+        "userId": order.userId,
+        "orderNumber": order.orderNumber,
+        "clientName": order.clientName,
+        "clientEmail": order.clientEmail,
+        "clientPhone": order.clientPhone,
+        "clientAddress": order.clientAddress,
+        "orderDate": order.orderDate.isoformat() if isinstance(order.orderDate, datetime) else str(order.orderDate),
+        "deliveryDate": order.deliveryDate.isoformat() if isinstance(order.deliveryDate, datetime) else (str(order.deliveryDate) if order.deliveryDate else ""),
+        "info": order.info or "",
+        "status": order.status,
+        "totalPrice": order.totalPrice,
+        "paymentMethod": order.paymentMethod,
+        "products": _encode_json([p.dict() for p in order.products])
+    }
+
+
+def _plain(value):
+    return "" if value is None else value
+
+
+def _date_cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return _plain(value)
+
+
+def _price_cell(value):
+    if type(value) is int:
+        return float(value)
+    return _plain(value)
+
+
+def _products_cell(value):
+    products = _fast_products(value)
+    try:
+        return _encode_json(products if products is not None else (value or []))
+    except Exception:
+        return str(value)
+
+
+_CELL_FORMATTERS = {
+    "orderDate": _date_cell,
+    "deliveryDate": _date_cell,
+    "info": lambda value: value or "",
+    "totalPrice": _price_cell,
+    "products": _products_cell,
+}
+
+
+def _projected_row(doc, columns):
+    # Export cu subset de coloane: documentul proiectat nu poate fi validat cu
+    # OrderProps, asa ca fiecare camp e formatat independent.
+    return {c: _CELL_FORMATTERS.get(c, _plain)(doc.get(c)) for c in columns}
+
+
+def normalize_orders(docs, columns=None):
+    """Turn a batch of raw Mongo documents into export rows (dicts keyed by ORDER_COLUMNS).
+
+    Documents that already match the OrderProps shape skip pydantic entirely;
+    the rest are validated and, if invalid, exported with their raw fields.
+    With a column subset (projected documents) each selected field is
+    formatted on its own.
+    """
+    rows = []
+    append = rows.append
+    if columns is not None and list(columns) != ORDER_COLUMNS:
+        for doc in docs:
+            _map_id(doc)
+            append(_projected_row(doc, columns))
+        return rows
+    for doc in docs:
+        _map_id(doc)
+        row = _fast_row(doc)
+        if row is None:
+            row = _validated_row(doc)
+        append(row)
+    return rows
@@ -0,0 +1,78 @@
+from src.utils.normalize import ORDER_COLUMNS
+
+# indexurile care sustin filtrele de export si cautarea facturilor (liste de chei)
+ORDER_INDEXES = [
+    # filtrele pe orderDate + paginarea keyset din GET /orders (sort orderDate, _id)
+    [("orderDate", 1), ("_id", 1)],
+    [("status", 1)],
+    [("orderNumber", 1)],
+    [("id", 1)],
+    # watermark pentru refresh-ul incremental al snapshot-ului
+    [("updatedAt", 1)],
+]
+
+
+def _date_range(start, end):
+    # interval semi-deschis [start, end)
+    cond = {}
+    if start is not None:
+        cond["$gte"] = start
+    if end is not None:
+        cond["$lt"] = end
+    return cond
+
+
+def _one_or_many(values):
+    values = [v for v in (values or []) if v]
+    if not values:
+        return None
+    return values[0] if len(values) == 1 else {"$in": values}
+
+
+def build_order_filter(order_date_from=None, order_date_to=None,
+                       delivery_date_from=None, delivery_date_to=None,
+                       status=None, payment_method=None):
+    """Translate the export query parameters into a Mongo filter document."""
+    query = {}
+    order_date = _date_range(order_date_from, order_date_to)
+    if order_date:
+        query["orderDate"] = order_date
+    delivery_date = _date_range(delivery_date_from, delivery_date_to)
+    if delivery_date:
+        query["deliveryDate"] = delivery_date
+    status = _one_or_many(status)
+    if status is not None:
+        query["status"] = status
+    payment_method = _one_or_many(payment_method)
+    if payment_method is not None:
+        query["paymentMethod"] = payment_method
+    return query
+
+
+def parse_columns(columns):
+    """Parse ``columns=id,orderNumber,...`` into a list in ORDER_COLUMNS order.
+
+    Raises ValueError for unknown column names.
+    """
+    if not columns:
+        return list(ORDER_COLUMNS)
+    requested = {c.strip() for c in columns.split(",") if c.strip()}
+    unknown = requested.difference(ORDER_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+    if not requested:
+        return list(ORDER_COLUMNS)
+    return [c for c in ORDER_COLUMNS if c in requested]
+
+
+def build_projection(columns):
+    """Mongo projection for the selected export columns (None = every field)."""
+    if list(columns) == ORDER_COLUMNS:
+        return None
+    projection = {c: 1 for c in columns}
+    if "id" in projection:
+        # id poate veni si din _id
+        projection["_id"] = 1
+    else:
+        projection["_id"] = 0
+    return projection
@@ -0,0 +1,218 @@
+"""Parallel export: the matched orders are split into key ranges, each range is
+fetched, normalized and encoded in a worker process, and the parent stitches
+the per-partition files together in key order.
+"""
+import time
+from datetime import datetime
+
+from src.utils.csv_export import CsvEncoder
+from src.utils.excel import StreamingXlsxWriter, XlsxRowEncoder
+from src.utils.line_items import line_item_rows
+from src.utils.normalize import normalize_orders
+
+# cheie de partitionare -> tipul BSON al valorilor folosite la intervale
+SPLIT_KEYS = {"orderDate": "date", "_id": "objectId"}
+# documente esantionate per partitie pentru alegerea granitelor
+SAMPLES_PER_PARTITION = 20
+# titlul foii pentru comenzile fara orderDate valid (sheetBy=month)
+UNDATED_SHEET = "Fara data"
+MERGE_CHUNK_SIZE = 1024 * 1024
+
+
+def _and(query, condition):
+    return {"$and": [query, condition]} if query else condition
+
+
+def _sort(key):
+    # (orderDate, _id) e acoperit de indexul compus din ORDER_INDEXES
+    return [("orderDate", 1), ("_id", 1)] if key == "orderDate" else [("_id", 1)]
+
+
+async def sample_split_points(collection, query, key, partitions):
+    """Up to ``partitions - 1`` ascending ``key`` values cutting the matched orders into similar ranges.
+
+    Uses a ``$sample`` of the matched documents, so only a few hundred keys
+    cross the network whatever the collection size.
+    """
+    if partitions < 2:
+        return []
+    pipeline = [
+        {"$match": _and(query, {key: {"$type": SPLIT_KEYS[key]}})},
+        {"$sample": {"size": partitions * SAMPLES_PER_PARTITION}},
+        {"$project": {"_id": 0, "k": f"${key}"}},
+    ]
+    cursor = await collection.aggregate(pipeline)
+    try:
+        values = sorted({doc["k"] for doc in await cursor.to_list(None)})
+    finally:
+        await cursor.close()
+    step = len(values) / partitions
+    points = []
+    for i in range(1, partitions):
+        value = values[int(i * step)] if values else None
+        if value is not None and (not points or value > points[-1]):
+            points.append(value)
+    return points
+
+
+def range_partitions(query, key, points):
+    """Partitions covering every order matched by ``query``, in ``key`` order.
+
+    The last one collects the orders whose ``key`` is missing or of another type.
+    """
+    bson_type = SPLIT_KEYS[key]
+    bounds = [None] + list(points) + [None]
+    partitions = []
+    for low, high in zip(bounds, bounds[1:]):
+        condition = {"$type": bson_type}
+        if low is not None:
+            condition["$gte"] = low
+        if high is not None:
+            condition["$lt"] = high
+        partitions.append({"title": None, "filter": _and(query, {key: condition}), "sort": _sort(key)})
+    partitions.append({
+        "title": None,
+        "filter": _and(query, {key: {"$not": {"$type": bson_type}}}),
+        "sort": _sort("_id"),
+    })
+    return partitions
+
+
+def _next_month(value):
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+async def month_partitions(collection, query):
+    """One partition per calendar month between the first and last ``orderDate``, plus undated orders."""
+    dated = _and(query, {"orderDate": {"$type": "date"}})
+    edges = []
+    for direction in (1, -1):
+        docs = await collection.find(dated, {"orderDate": 1}).sort("orderDate", direction).limit(1).to_list(1)
+        edges.append(docs[0]["orderDate"] if docs else None)
+    partitions = []
+    first, last = edges
+    if first is not None:
+        month = datetime(first.year, first.month, 1)
+        while month <= last:
+            end = _next_month(month)
+            partitions.append({
+                "title": month.strftime("%Y-%m"),
+                "filter": _and(query, {"orderDate": {"$gte": month, "$lt": end}}),
+                "sort": _sort("orderDate"),
+            })
+            month = end
+    partitions.append({
+        "title": UNDATED_SHEET,
+        "filter": _and(query, {"orderDate": {"$not": {"$type": "date"}}}),
+        "sort": _sort("_id"),
+    })
+    return partitions
+
+
+# --- worker -----------------------------------------------------------------
+# un client sync per proces worker, refolosit intre partitii
+_clients = {}
+
+
+def _worker_collection(mongo):
+    uri, db_name, collection_name, options = mongo
+    client = _clients.get(uri)
+    if client is None:
+        from pymongo import MongoClient
+        client = _clients[uri] = MongoClient(uri, **options)
+    return client[db_name][collection_name]
+
+
+def export_partition(task):
+    """Fetch, normalize and encode one partition into ``task["path"]`` (runs in a worker process).
+
+    Returns the order and row counts and the time spent per stage.
+    """
+    collection = _worker_collection(task["mongo"])
+    columns = task["columns"]
+    to_rows = line_item_rows if task["layout"] == "lines" else normalize_orders
+    if task["format"] == "xlsx":
+        encoder = XlsxRowEncoder(columns, task["first_row"])
+    else:
+        encoder = CsvEncoder(columns)
+    batch_size = task["batch_size"]
+    stats = {"orders": 0, "rows": 0, "fetch": 0.0, "normalize": 0.0, "encode": 0.0}
+
+    cursor = collection.find(
+        task["filter"], task["projection"], sort=task["sort"], limit=task["limit"] or 0, batch_size=batch_size
+    )
+    try:
+        with open(task["path"], "wb") as f:
+            while True:
+                t0 = time.perf_counter()
+                docs = []
+                for doc in cursor:
+                    docs.append(doc)
+                    if len(docs) >= batch_size:
+                        break
+                t1 = time.perf_counter()
+                stats["fetch"] += t1 - t0
+                if not docs:
+                    break
+                rows = to_rows(docs, columns)
+                t2 = time.perf_counter()
+                f.write(encoder.encode(rows))
+                stats["normalize"] += t2 - t1
+                stats["encode"] += time.perf_counter() - t2
+                stats["orders"] += len(docs)
+                stats["rows"] += len(rows)
+    finally:
+        cursor.close()
+    return stats
+
+
+# --- merge --------------------------------------------------------------------
+
+class CsvMerger:
+    """Writes the CSV header, then passes partition files through unchanged."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+
+    def start(self):
+        return CsvEncoder(self.columns).start()
+
+    def encode(self, data):
+        return data
+
+    def finish(self):
+        return b""
+
+
+class XlsxMerger:
+    """Writes partition ``<row>`` fragments into one sheet, or one sheet per partition."""
+
+    def __init__(self, columns, sheet_title="Sheet1", sheet_per_partition=False):
+        self.columns = list(columns)
+        self.sheet_title = sheet_title
+        self.sheet_per_partition = sheet_per_partition
+        self._writer = StreamingXlsxWriter()
+
+    def start(self):
+        if not self.sheet_per_partition:
+            self._writer.open_sheet(self.sheet_title, self.columns)
+        return self._writer.drain()
+
+    def open_sheet(self, title):
+        self._writer.open_sheet(title, self.columns)
+        return self._writer.drain()
+
+    def encode(self, data):
+        self._writer.write_row_xml(data)
+        return self._writer.drain()
+
+    def finish(self):
+        return self._writer.close()
+
+
+def merge_chunk(encoder, f):
+    """Next chunk of a partition file passed through the merger; None at EOF."""
+    data = f.read(MERGE_CHUNK_SIZE)
+    if not data:
+        return None
+    return encoder.encode(data)
@@ -0,0 +1,313 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from bson import ObjectId
+
+from src.utils.normalize import ORDER_COLUMNS, normalize_orders
+
+SNAPSHOT_FILE = "orders.arrow"
+SNAPSHOT_META = "meta.json"
+
+# campul actualizat de rutele CRUD la fiecare scriere (watermark pentru refresh)
+UPDATED_AT_FIELD = "updatedAt"
+# ObjectId-urile si ceasurile serverelor nu sunt strict monotone: re-citim o fereastra
+# scurta inainte de watermark (duplicatele sunt eliminate la merge)
+WATERMARK_OVERLAP = timedelta(minutes=1)
+
+# coloane tehnice pastrate langa randurile normalizate
+_KEY = "_key"
+_TYPED_COLUMNS = {
+    # filtrele pe date lucreaza pe valorile tipizate, nu pe textul ISO
+    "orderDate": "_orderDate",
+    "deliveryDate": "_deliveryDate",
+}
+_NUMERIC_COLUMNS = {
+    "orderNumber": ("_orderNumber", int, pa.int64()),
+    "totalPrice": ("_totalPrice", float, pa.float64()),
+}
+
+SNAPSHOT_SCHEMA = pa.schema(
+    [(_KEY, pa.string()), ("_updatedAt", pa.timestamp("us"))]
+    + [(typed, pa.timestamp("us")) for typed in _TYPED_COLUMNS.values()]
+    + [(name, arrow_type) for name, _, arrow_type in _NUMERIC_COLUMNS.values()]
+    + [(c, pa.string()) for c in ORDER_COLUMNS]
+)
+
+
+def _naive_utc(value):
+    # Mongo intoarce datetime-uri naive (UTC); aliniem si valorile cu timezone
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    return None
+
+
+def _text(value):
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+def docs_to_table(docs):
+    """Normalize raw documents into a snapshot table (SNAPSHOT_SCHEMA)."""
+    keys = [str(doc.get("_id", doc.get("id", ""))) for doc in docs]
+    updated = [_naive_utc(doc.get(UPDATED_AT_FIELD)) for doc in docs]
+    # valorile tipizate sunt citite inainte de normalizare (care le transforma in text)
+    typed = {
+        name: [_naive_utc(doc.get(field)) for doc in docs]
+        for field, name in _TYPED_COLUMNS.items()
+    }
+    rows = normalize_orders(docs)
+
+    arrays = {_KEY: keys, "_updatedAt": updated}
+    arrays.update(typed)
+    for column in ORDER_COLUMNS:
+        values = [row[column] for row in rows]
+        if column in _NUMERIC_COLUMNS:
+            name, py_type, _ = _NUMERIC_COLUMNS[column]
+            arrays[name] = [v if type(v) is py_type else None for v in values]
+            arrays[column] = [None if type(v) is py_type else _text(v) for v in values]
+        else:
+            arrays[column] = [_text(v) for v in values]
+    return pa.Table.from_pydict(arrays, schema=SNAPSHOT_SCHEMA)
+
+
+def _scalar(value):
+    return pa.scalar(_naive_utc(value), pa.timestamp("us")) if isinstance(value, datetime) else value
+
+
+def filter_mask(table, query):
+    """Evaluate a filter produced by ``build_order_filter`` against the snapshot."""
+    mask = None
+    for field, cond in (query or {}).items():
+        column = table[_TYPED_COLUMNS.get(field, field)]
+        if isinstance(cond, dict):
+            parts = []
+            for op, value in cond.items():
+                if op == "$gte":
+                    parts.append(pc.greater_equal(column, _scalar(value)))
+                elif op == "$lt":
+                    parts.append(pc.less(column, _scalar(value)))
+                elif op == "$in":
+                    parts.append(pc.is_in(column, value_set=pa.array(value)))
+                else:
+                    raise ValueError(f"Unsupported snapshot filter: {op}")
+        else:
+            parts = [pc.equal(column, cond)]
+        for part in parts:
+            mask = part if mask is None else pc.and_(mask, part)
+    return mask
+
+
+def _table_rows(batch, columns):
+    rows = batch.to_pylist()
+    numeric = [(c, _NUMERIC_COLUMNS[c][0]) for c in columns if c in _NUMERIC_COLUMNS]
+    for row in rows:
+        for column, typed in numeric:
+            value = row.pop(typed)
+            if value is not None:
+                row[column] = value
+    return rows
+
+
+class OrderSnapshot:
+    """Local Arrow IPC copy of the normalized orders, refreshed incrementally.
+
+    A refresh only fetches documents whose ``updatedAt`` is newer than the
+    stored watermark or whose ObjectId ``_id`` is newer than the last one
+    seen. Deleted orders are dropped by comparing the ``_id`` list, which is
+    only done when the document count disagrees with the snapshot, every
+    ``reconcile_interval`` seconds, or on demand.
+    """
+
+    def __init__(self, directory, reconcile_interval=3600):
+        self.directory = directory
+        self.reconcile_interval = reconcile_interval
+        self.path = os.path.join(directory, SNAPSHOT_FILE)
+        self.meta_path = os.path.join(directory, SNAPSHOT_META)
+        self._lock = asyncio.Lock()
+        self._table = None
+
+    def _load_meta(self):
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self):
+        """Memory-map the snapshot from disk (None if there is none yet)."""
+        if self._table is None and os.path.exists(self.path) and self._load_meta():
+            with pa.memory_map(self.path) as source:
+                self._table = pa.ipc.open_file(source).read_all()
+        return self._table
+
+    def _write_meta(self, meta):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_meta = f"{self.meta_path}.{os.getpid()}.tmp"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, self.meta_path)
+
+    def _write(self, table, meta):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, self.path)
+        self._write_meta(meta)
+        self._table = table
+
+    @staticmethod
+    def _changes(old, delta):
+        """Rows of ``delta`` that differ from the snapshot, and how many are new orders.
+
+        The watermark overlap re-reads the latest orders on every refresh;
+        rows identical to the stored ones are dropped here.
+        """
+        if delta.num_rows == 0:
+            return delta, 0
+        existing = old.filter(pc.is_in(old[_KEY], value_set=delta[_KEY]))
+        known = {row[_KEY]: row for row in existing.to_pylist()}
+        rows = delta.to_pylist()
+        changed = pa.array([known.get(row[_KEY]) != row for row in rows], pa.bool_())
+        added = sum(1 for row in rows if row[_KEY] not in known)
+        return delta.filter(changed), added
+
+    @staticmethod
+    def _merge(old, delta, live_keys):
+        # randurile modificate sunt inlocuite pe loc, iar comenzile noi adaugate la final,
+        # deci ordinea _id (ObjectId hex ~ ordinea inserarii) se pastreaza fara sortare
+        table = old
+        added = delta
+        if delta.num_rows:
+            positions = pc.index_in(old[_KEY], value_set=delta[_KEY])
+            updated = pc.is_valid(positions)
+            if pc.any(updated).as_py():
+                table = pa.table(
+                    {name: pc.if_else(updated, delta[name].take(positions), old[name]) for name in old.column_names},
+                    schema=old.schema,
+                )
+            added = delta.filter(pc.invert(pc.is_in(delta[_KEY], value_set=old[_KEY]))).sort_by(_KEY)
+        if live_keys is not None:
+            table = table.filter(pc.is_in(table[_KEY], value_set=pa.array(live_keys, pa.string())))
+        if added.num_rows == 0:
+            return table
+        in_order = table.num_rows == 0 or table[_KEY][-1].as_py() < added[_KEY][0].as_py()
+        merged = pa.concat_tables([table, added])
+        # doar un _id mai vechi decat ultimul din snapshot (ceasuri decalate) cere sortare
+        return merged if in_order else merged.sort_by(_KEY)
+
+    async def _live_keys(self, collection, batch_size):
+        # doar _id-urile trec prin retea, pentru a detecta comenzile sterse
+        live_keys = []
+        cursor = collection.find({}, {"_id": 1}, batch_size=10 * batch_size)
+        try:
+            async for doc in cursor:
+                live_keys.append(str(doc["_id"]))
+        finally:
+            await cursor.close()
+        return live_keys
+
+    def _reconcile_due(self, meta):
+        reconciled_at = meta.get("reconciledAt")
+        if not reconciled_at:
+            return True
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(reconciled_at)
+        return age.total_seconds() >= self.reconcile_interval
+
+    async def refresh(self, collection, run_cpu, batch_size=1000, reconcile_deletes=None):
+        """Bring the snapshot up to date; returns refresh statistics.
+
+        ``reconcile_deletes=None`` compares the ``_id`` list only when needed
+        (count mismatch or ``reconcile_interval`` elapsed); True forces it.
+        """
+        async with self._lock:
+            table = await run_cpu(self.load)
+            meta = self._load_meta() if table is not None else {}
+            query = {}
+            max_updated = datetime.fromisoformat(meta["updatedAt"]) if meta.get("updatedAt") else None
+            last_oid = ObjectId(meta["lastObjectId"]) if meta.get("lastObjectId") else None
+            if table is not None:
+                delta_query = []
+                if max_updated is not None:
+                    delta_query.append({UPDATED_AT_FIELD: {"$gte": max_updated - WATERMARK_OVERLAP}})
+                if last_oid is not None:
+                    since = last_oid.generation_time - WATERMARK_OVERLAP
+                    delta_query.append({"_id": {"$gte": ObjectId.from_datetime(since)}})
+                query = {"$or": delta_query} if delta_query else {}
+                if not delta_query:
+                    table = None  # fara watermark: reincarcare completa
+
+            parts = []
+            cursor = collection.find(query, batch_size=batch_size)
+            try:
+                while True:
+                    docs = await cursor.to_list(batch_size)
+                    if not docs:
+                        break
+                    for doc in docs:
+                        updated = _naive_utc(doc.get(UPDATED_AT_FIELD))
+                        if updated is not None and (max_updated is None or updated > max_updated):
+                            max_updated = updated
+                        oid = doc.get("_id")
+                        if isinstance(oid, ObjectId) and (last_oid is None or oid > last_oid):
+                            last_oid = oid
+                    parts.append(await run_cpu(docs_to_table, docs))
+            finally:
+                await cursor.close()
+            delta = pa.concat_tables(parts) if parts else SNAPSHOT_SCHEMA.empty_table()
+            now = datetime.now(timezone.utc).isoformat()
+            new_meta = {
+                "updatedAt": max_updated.isoformat() if max_updated else None,
+                "lastObjectId": str(last_oid) if last_oid else None,
+                "refreshedAt": now,
+                "reconciledAt": meta.get("reconciledAt") if table is not None else now,
+            }
+
+            if table is None:
+                merged = delta.combine_chunks()
+                new_meta["rows"] = merged.num_rows
+                await run_cpu(self._write, merged, new_meta)
+                return {"fetched": delta.num_rows, "changed": delta.num_rows, "rows": merged.num_rows, "full": True}
+
+            changed, added = await run_cpu(self._changes, table, delta)
+            if reconcile_deletes is None:
+                # count-ul din metadatele colectiei nu scaneaza nimic; o diferenta inseamna stergeri
+                live_count = await collection.estimated_document_count()
+                reconcile_deletes = live_count != table.num_rows + added or self._reconcile_due(meta)
+            live_keys = await self._live_keys(collection, batch_size) if reconcile_deletes else None
+            if reconcile_deletes:
+                new_meta["reconciledAt"] = now
+
+            stats = {"fetched": delta.num_rows, "changed": changed.num_rows, "rows": table.num_rows, "full": False}
+            if changed.num_rows == 0 and (live_keys is None or len(live_keys) == table.num_rows):
+                # nimic nou: fisierul Arrow ramane cum e, doar metadatele (daca e cazul)
+                if new_meta["reconciledAt"] != meta.get("reconciledAt"):
+                    new_meta["rows"] = table.num_rows
+                    await run_cpu(self._write_meta, new_meta)
+                return stats
+            merged = await run_cpu(self._merge, table, changed, live_keys)
+            new_meta["rows"] = merged.num_rows
+            await run_cpu(self._write, merged, new_meta)
+            stats["rows"] = merged.num_rows
+            return stats
+
+    def iter_row_batches(self, query=None, columns=None, batch_size=1000):
+        """Yield lists of export rows (like ``normalize_orders``) from the snapshot."""
+        columns = list(columns or ORDER_COLUMNS)
+        table = self.load()
+        if table is None:
+            return
+        mask = filter_mask(table, query)
+        if mask is not None:
+            table = table.filter(mask)
+        selected = columns + [_NUMERIC_COLUMNS[c][0] for c in columns if c in _NUMERIC_COLUMNS]
+        for batch in table.select(selected).to_batches(max_chunksize=batch_size):
+            yield _table_rows(batch, columns)
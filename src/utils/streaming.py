@@ -0,0 +1,21 @@
+class ChunkSink:
+    """Write-only file object that collects bytes until ``drain()`` is called.
+
+    It has no ``tell()``, so zipfile treats it as unseekable and writes data
+    descriptors. An archive can therefore be streamed out while it is built.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data